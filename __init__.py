@@ -51,6 +51,11 @@ if "bpy" in locals():
 import bpy
 
 from . import operators, panels
+from .operators.copy_color import ColorBinding, target_propagator
+from .operators.recall import sync_history_file
+from .operators.region_monitor import MonitorRegion
+from .operators.profiling import profiler
+from .operators.publish import is_publishing
 
 bl_info = {
     'name': 'Color Picker Pro',
@@ -66,18 +71,22 @@ bl_info = {
 NAME = bl_info['name']
 
 
+def update_debug(self, context):
+    profiler.enabled = self.picker_debug
+
+
+def update_history_file(self, context):
+    sync_history_file(self)
+
+
 def update_color(self, context):
     wm = self
 
-    if not wm.update_target or not wm.update_source:
+    # a batch being published propagates once when it is done
+    if not wm.picker_bindings or is_publishing():
         return
 
-    prop_real = eval(wm.update_target)
-    median_real = getattr(wm, wm.update_source)
-
-    prop_real[0] = median_real[0]
-    prop_real[1] = median_real[1]
-    prop_real[2] = median_real[2]
+    target_propagator.request(wm)
 
 
 window_manager_props = [
@@ -106,6 +115,29 @@ window_manager_props = [
         name=NAME + ' Mean',
         description='The mean RGB values of the picked pixels',
         subtype='COLOR_GAMMA')),
+    ('picker_std', bpy.props.FloatVectorProperty(
+        default=(0.0, 0.0, 0.0),
+        precision=4,
+        name=NAME + ' Standard Deviation',
+        description='The standard deviation of the RGB values of the picked pixels, a measure of noise')),
+    ('picker_p05', bpy.props.FloatVectorProperty(
+        default=(0.0, 0.0, 0.0),
+        precision=4,
+        name=NAME + ' 5th Percentile',
+        description='The RGB values that 5% of the picked pixels are darker than, per channel',
+        subtype='COLOR_GAMMA')),
+    ('picker_p95', bpy.props.FloatVectorProperty(
+        default=(1.0, 1.0, 1.0),
+        precision=4,
+        name=NAME + ' 95th Percentile',
+        description='The RGB values that 5% of the picked pixels are brighter than, per channel',
+        subtype='COLOR_GAMMA')),
+    ('picker_trimmed', bpy.props.FloatVectorProperty(
+        default=(0.5, 0.5, 0.5),
+        precision=4,
+        name=NAME + ' Trimmed Mean',
+        description='The mean RGB values of the picked pixels, leaving out the darkest and brightest 5% per channel',
+        subtype='COLOR_GAMMA')),
     ('custom_size', bpy.props.IntProperty(
         default=10,
         min=2,
@@ -114,12 +146,126 @@ window_manager_props = [
         name='Custom Size',
         subtype='PIXEL',
         description='Custom tile size for color picker')),
-    ('update_source', bpy.props.StringProperty(
-        default='',
+    ('picker_kernel', bpy.props.EnumProperty(
+        name='Kernel',
+        description='Shape and weighting of the pixels the live picker samples',
+        items=[('SQUARE', 'Square', 'Every pixel of the square tile, weighted equally'),
+               ('CIRCLE', 'Circle', 'The pixels of the disc inside the tile, weighted equally'),
+               ('GAUSSIAN', 'Gaussian', 'The pixels of the disc inside the tile, weighted less away from its center. '
+                                        'Steadier on noisy renders')],
+        default='SQUARE')),
+    ('picker_palette_size', bpy.props.IntProperty(
+        default=8,
+        min=1,
+        max=32,
+        name='Palette Size',
+        description='Number of dominant colors extracted from a rectangle into a palette')),
+    ('picker_grid_rows', bpy.props.IntProperty(
+        default=4,
+        min=1,
+        max=64,
+        name='Chart Rows',
+        description='Rows of patches sampled from a color chart rectangle')),
+    ('picker_grid_cols', bpy.props.IntProperty(
+        default=6,
+        min=1,
+        max=64,
+        name='Chart Columns',
+        description='Columns of patches sampled from a color chart rectangle')),
+    ('picker_grid_inset', bpy.props.FloatProperty(
+        default=0.2,
+        min=0.0,
+        max=0.45,
+        subtype='FACTOR',
+        name='Patch Inset',
+        description='Share of each patch left out on every side, to skip the borders between patches')),
+    ('picker_patch_index', bpy.props.IntProperty(
+        default=0,
+        min=0,
+        name='Patch',
+        description='Sampled patch to copy to the picker results, numbered row by row from the top left')),
+    ('picker_sample_rate', bpy.props.IntProperty(
+        default=60,
+        min=0,
+        soft_max=240,
+        name='Sample Rate',
+        description='Maximum live picker samples per second, 0 to sample once per redraw')),
+    ('picker_use_snapshot', bpy.props.BoolProperty(
+        default=False,
+        name='Snapshot',
+        description=('Read the screen once when a picker starts and answer every sample from that copy. '
+                     'Faster for large tiles and rectangles, rebuilt when the scene changes'))),
+    ('picker_sample_image', bpy.props.BoolProperty(
+        default=False,
+        name='Image Data',
+        description=('In the Image Editor, sample the pixel values stored in the image '
+                     'instead of the screen, independent of zoom, display transform and overlays'))),
+    ('picker_scene_linear', bpy.props.BoolProperty(
+        default=False,
+        name='Scene-Linear',
+        description=('The picked values are scene-linear, read from a float image, '
+                     'instead of display-referred screen colors'))),
+    ('picker_update_rate', bpy.props.IntProperty(
+        default=10,
+        min=0,
+        soft_max=60,
+        name='Update Rate',
+        description=('Maximum updates per second of the target color property while picking live, '
+                     '0 to update on every sample. The final pick is always written'))),
+    ('picker_readback', bpy.props.EnumProperty(
+        name='Readback',
+        description='Precision of the pixels read from the screen',
+        items=[('AUTO', 'Auto', '8-bit, or float while the scene view shows HDR'),
+               ('FLOAT', 'Float', 'Full precision, for float or HDR framebuffers'),
+               ('UBYTE', '8-bit', 'Exact for 8-bit displays, four times less data and faster statistics')],
+        default='AUTO')),
+    ('picker_readout', bpy.props.EnumProperty(
+        name='Readout',
+        description='Also show the median in another color space',
+        items=[('NONE', 'None', 'Only show the picked colors'),
+               ('HSV', 'HSV', 'Hue, saturation and value of the displayed median'),
+               ('LAB', 'CIELAB', 'Lightness and a, b of the scene-linear median, D65 white')],
+        default='NONE')),
+    ('picker_history_file', bpy.props.BoolProperty(
+        default=False,
+        name='Save History',
+        description=('Keep the pick history in a file beside the blend file, '
+                     'so it is still there after reopening it'),
+        update=update_history_file)),
+    ('picker_history_age', bpy.props.IntProperty(
+        default=0,
+        min=0,
+        name='Picks Ago',
+        description='Earlier pick to recall, 0 being the latest')),
+    ('picker_monitor_index', bpy.props.IntProperty(
+        default=0,
+        min=0,
+        name='Published Region',
+        description='Pinned region whose statistics the monitor writes to the picker results and bound properties')),
+    ('picker_monitor_interval', bpy.props.FloatProperty(
+        default=0.25,
+        min=0.02,
+        soft_max=2.0,
+        name='Interval',
+        description='Seconds between checks of the pinned regions while monitoring')),
+    ('picker_monitor_budget', bpy.props.FloatProperty(
+        default=8.0,
+        min=1.0,
+        soft_max=50.0,
+        name='Budget',
+        description=('Milliseconds each check may spend sampling regions, the rest wait for the next check. '
+                     'At least one region is sampled per check'))),
+    ('picker_debug', bpy.props.BoolProperty(
+        default=False,
+        name='Record Timings',
+        description='Record how long each phase of picking takes, for diagnosing lag',
+        update=update_debug)),
+    ('picker_bindings', bpy.props.CollectionProperty(
+        type=ColorBinding,
         options={'HIDDEN'}
     )),
-    ('update_target', bpy.props.StringProperty(
-        default='',
+    ('picker_monitor_regions', bpy.props.CollectionProperty(
+        type=MonitorRegion,
         options={'HIDDEN'}
     ))
 ]
@@ -128,16 +274,17 @@ window_manager_props = [
 def register():
     window_manager = bpy.types.WindowManager
 
+    # registers ColorBinding, which picker_bindings needs
+    operators.register()
+
     for name, prop in window_manager_props:
         setattr(window_manager, name, prop)
 
-    operators.register()
     panels.register()
 
 
 def unregister():
     panels.unregister()
-    operators.unregister()
 
     for name, _ in window_manager_props:
         try:
@@ -145,6 +292,8 @@ def unregister():
         except AttributeError:
             pass
 
+    operators.unregister()
+
 
 if __name__ == '__main__':
     register()
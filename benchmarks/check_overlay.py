@@ -0,0 +1,79 @@
+"""
+Regression check of the overlay batch cache: replays the draw calls of a picker
+session against operators/overlay.py with a stubbed gpu, counting how often
+batches and their geometry are built:
+
+    python benchmarks/check_overlay.py --draws 1000
+
+Exits with status 1 if any batch or geometry is built again while its key stays
+the same, or if a changed key does not rebuild it.
+"""
+
+import argparse
+import importlib
+import sys
+import time
+
+import fake_blender
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--draws', type=int, default=1000, help='draw calls per overlay element')
+    args = parser.parse_args()
+
+    fake_blender.install(None)
+    fake_blender.import_addon()
+    overlay = importlib.import_module(fake_blender.ADDON_NAME + '.operators.overlay')
+
+    built = []
+    batches = overlay.OverlayBatches(batch_factory=lambda shader, primitive, content, indices=None: built.append(
+        primitive) or object())
+
+    geometry_calls = []
+    for name in ('swatch_geometry', 'unit_rect_edges', 'unit_circle_edges', 'unit_grid_edges'):
+        def counted(*function_args, _name=name, _function=getattr(overlay, name)):
+            geometry_calls.append(_name)
+            return _function(*function_args)
+        setattr(overlay, name, counted)
+
+    # each element with the key it is drawn with at every draw, the swatch changing size halfway
+    elements = (
+        ('swatch', lambda draw: 3 if draw < args.draws // 2 else 9, batches.swatch),
+        ('rect', lambda draw: None, lambda key: batches.rect()),
+        ('circle', lambda draw: None, lambda key: batches.circle()),
+        ('grid', lambda draw: (4, 6), lambda key: batches.grid(*key)),
+    )
+
+    failed = False
+    for name, key_of, draw in elements:
+        built.clear()
+        geometry_calls.clear()
+        previous_key, previous = object(), None
+        keys = 0
+
+        start = time.perf_counter()
+        for index in range(args.draws):
+            key = key_of(index)
+            result = draw(key)
+            if (result is previous) != (key == previous_key):
+                print('{}: draw {} did not follow its key'.format(name, index))
+                failed = True
+                break
+            if key != previous_key:
+                keys += 1
+            previous_key, previous = key, result
+        duration = time.perf_counter() - start
+
+        print('{}: {} draws in {:.2f} ms, {} keys, {} batches and {} geometry builds'.format(
+            name, args.draws, duration * 1000.0, keys, len(built), len(geometry_calls)))
+        # the swatch builds a fill and an edge batch from one geometry
+        if len(geometry_calls) != keys or len(built) != keys * (2 if name == 'swatch' else 1):
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Regression check of the framebuffer readback: time and peak memory of turning
+a read_color buffer into RGB pixels through operators/readback.py, against the
+original to_list(), np.array and np.delete path, on synthetic buffers:
+
+    python benchmarks/check_readback.py --sizes 256 1024
+
+Exits with status 1 if the pixels differ, or if the buffer protocol path is
+not both faster and smaller than the original one at every size.
+"""
+
+import argparse
+import importlib
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import fake_blender
+
+
+def original_rgb(buffer, width, height):
+    """The conversion the operators did before the readback helpers"""
+    return np.delete(np.array(buffer.to_list()).reshape((width * height, 4)), 3, axis=1)
+
+
+def measure(function, repeats):
+    """Best time in seconds over repeats, and peak bytes allocated by one call"""
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return min(durations), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[64, 256, 1024], help='square buffer sizes')
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    fake_blender.install(None)
+    fake_blender.import_addon()
+    readback = importlib.import_module(fake_blender.ADDON_NAME + '.operators.readback')
+
+    failed = False
+    for size in args.sizes:
+        buffer = fake_blender.FakeFramebuffer(size, size).read_color(0, 0, size, size, 4, 0, 'FLOAT')
+
+        def current():
+            return readback.rgb_view(readback.buffer_to_array(buffer, size, size))
+
+        if not np.array_equal(current(), original_rgb(buffer, size, size).astype(np.float32)):
+            print('{0}x{0}: pixels differ from the original path'.format(size))
+            failed = True
+            continue
+
+        original_s, original_bytes = measure(lambda: original_rgb(buffer, size, size), args.repeats)
+        current_s, current_bytes = measure(current, args.repeats)
+        print('{0}x{0}: original {1:.2f} ms, {2} bytes; buffer protocol {3:.3f} ms, {4} bytes'.format(
+            size, original_s * 1000.0, original_bytes, current_s * 1000.0, current_bytes))
+        if current_s >= original_s or current_bytes >= original_bytes:
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Regression check of the peak memory of large rectangle picks: drives
+ScreenRectOperator over rectangles of several tiles against the synthetic
+framebuffer, until the tiled statistics job has delivered its results:
+
+    python benchmarks/check_rect_memory.py --sizes 2048x2048 3840x2160
+
+Exits with status 1 if the peak of any pick exceeds --max-tiles times the size of
+one tile's read, as memory must stay bounded by the tile size, not the rectangle.
+"""
+
+import argparse
+import importlib
+import sys
+import tracemalloc
+
+import fake_blender
+
+READBACK_FORMATS = {'FLOAT': 4, 'UBYTE': 1}
+
+
+def parse_size(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def pick_peak(addon, bpy, width, height, readback):
+    """Peak bytes allocated by one rectangle pick over (0, 0, width, height), results included"""
+    wm = fake_blender.FakeWindowManager(addon, picker_readback=readback)
+    context = fake_blender.make_context(wm)
+    bpy.context = context
+
+    operator = addon.operators.ScreenRectOperator()
+    operator.invoke(context, fake_blender.make_event('MOUSEMOVE', 0, 0))
+    operator.modal(context, fake_blender.make_event('LEFTMOUSE', 0, 0))
+    operator.modal(context, fake_blender.make_event('RIGHTMOUSE', width - 1, height - 1))
+    # skip the wait for the outline to disappear
+    operator.finished -= 1.0
+
+    tracemalloc.start()
+    try:
+        operator.modal(context, fake_blender.make_event('TIMER', width - 1, height - 1))
+        bpy.app.timers.run_until_idle()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    # a pick that never delivered would pass with a low peak
+    picks = importlib.import_module(fake_blender.ADDON_NAME + '.operators.history').pick_history
+    if not len(picks):
+        raise RuntimeError('the {}x{} pick delivered no results'.format(width, height))
+    picks.clear()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=parse_size, nargs='+', default=[(2048, 2048), (3840, 2160)],
+                        help='rectangle sizes as WIDTHxHEIGHT')
+    parser.add_argument('--max-tiles', type=float, default=8.0,
+                        help='allowed peak in multiples of one tile read')
+    args = parser.parse_args()
+
+    framebuffer = fake_blender.FakeFramebuffer(max(w for w, _ in args.sizes), max(h for _, h in args.sizes))
+    bpy = fake_blender.install(framebuffer)
+    addon = fake_blender.import_addon()
+    tile_size = addon.operators.screen_rect.TILE_SIZE
+
+    failed = False
+    for readback, channel_bytes in READBACK_FORMATS.items():
+        budget = args.max_tiles * tile_size * tile_size * 4 * channel_bytes
+        for width, height in args.sizes:
+            peak = pick_peak(addon, bpy, width, height, readback)
+            print('{}x{} {}: peak {:.1f} MiB, budget {:.1f} MiB'.format(
+                width, height, readback, peak / 2 ** 20, budget / 2 ** 20))
+            if peak > budget:
+                failed = True
+
+    addon.operators.worker.shutdown()
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Startup cost of the addon: time to import and register it against the stub
+modules, and whether that pulled in NumPy or gpu_extras, which should only
+load when an operator first runs. Each run is a fresh interpreter, since
+imports are cached:
+
+    python benchmarks/check_startup.py --budget-ms 50
+
+Exits with status 1 if the median exceeds the budget or NumPy was imported,
+and fails outright if gpu_extras was.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+
+def measure():
+    """Run in the child interpreter: imports and registers the addon, prints the result as JSON"""
+    import fake_blender
+
+    fake_blender.install(None)
+    # without the stub, importing gpu_extras at startup fails the check
+    del sys.modules['gpu_extras'], sys.modules['gpu_extras.batch']
+
+    start = time.perf_counter()
+    addon = fake_blender.import_addon()
+    addon.register()
+    duration = time.perf_counter() - start
+
+    print(json.dumps({'ms': duration * 1000.0, 'numpy': 'numpy' in sys.modules}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget-ms', type=float, default=50.0, help='maximum median import and register time')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        measure()
+        return
+
+    results = [json.loads(subprocess.check_output([sys.executable, __file__, '--child'], text=True))
+               for _ in range(args.runs)]
+    median_ms = statistics.median(result['ms'] for result in results)
+    numpy_imported = any(result['numpy'] for result in results)
+
+    print('import and register: median {:.2f} ms, budget {:.2f} ms'.format(median_ms, args.budget_ms))
+    if numpy_imported:
+        print('NumPy was imported at startup')
+
+    if median_ms > args.budget_ms or numpy_imported:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
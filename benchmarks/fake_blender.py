@@ -0,0 +1,201 @@
+"""
+Minimal stand-ins for bpy, gpu and gpu_extras, enough to import the addon
+and drive its operators outside of Blender against a synthetic framebuffer.
+"""
+
+import array
+import importlib.util
+import os
+import sys
+import types
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADDON_NAME = 'color_picker_pro'
+
+
+class FakeBuffer(array.array):
+    """Flat pixel buffer that exposes the buffer protocol like gpu.types.Buffer, with its to_list() fallback"""
+
+    def __new__(cls, pixels):
+        typecode = 'B' if pixels.dtype.itemsize == 1 else 'f'
+        buffer = super().__new__(cls, typecode)
+        buffer.frombytes(pixels.tobytes())
+        buffer.dimensions = list(pixels.shape)
+        return buffer
+
+    def to_list(self):
+        return self.tolist()
+
+
+class FakeFramebuffer:
+    """Framebuffer of random 8-bit colors, read back into FakeBuffers like gpu.types.GPUFrameBuffer"""
+
+    def __init__(self, width, height, seed=0):
+        import numpy as np
+
+        rng = np.random.default_rng(seed)
+        self.width, self.height = width, height
+        self.pixels = rng.integers(0, 256, (height, width, 4), dtype=np.uint8)
+        self.reads = 0
+
+    def viewport_get(self):
+        return 0, 0, self.width, self.height
+
+    def read_color(self, x, y, width, height, channels, slot, data_format, data=None):
+        import numpy as np
+
+        self.reads += 1
+        pixels = self.pixels[y:y + height, x:x + width, :channels]
+        if data_format == 'UBYTE':
+            return FakeBuffer(pixels)
+        return FakeBuffer(pixels.astype(np.float32) / np.float32(255.0))
+
+
+class _Props(types.ModuleType):
+    """Property functions return their keyword arguments, like the deferred properties of bpy"""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: (name, kwargs)
+
+
+class _Space:
+    @classmethod
+    def draw_handler_add(cls, callback, args, region_type, draw_type):
+        return callback, args
+
+    @classmethod
+    def draw_handler_remove(cls, handler, region_type):
+        pass
+
+
+class _Struct:
+    def __init__(self):
+        # annotated properties start at their defaults, like registered operator properties
+        for name, prop in getattr(type(self), '__annotations__', {}).items():
+            if isinstance(prop, tuple):
+                setattr(self, name, prop[1].get('default'))
+
+
+class _Timers:
+    def __init__(self):
+        self.callbacks = []
+
+    def register(self, callback, first_interval=0.0, persistent=False):
+        self.callbacks.append(callback)
+
+    def is_registered(self, callback):
+        return callback in self.callbacks
+
+    def unregister(self, callback):
+        self.callbacks.remove(callback)
+
+    def run_until_idle(self):
+        """Calls registered timers until all of them are done"""
+        import time
+        while self.callbacks:
+            for callback in list(self.callbacks):
+                interval = callback()
+                if interval is None:
+                    self.callbacks.remove(callback)
+            time.sleep(0.001)
+
+
+def install(framebuffer):
+    """Puts the stub modules in sys.modules, returns the fake bpy module.
+
+    Without a framebuffer, only importing and registering the addon works.
+    """
+    bpy = types.ModuleType('bpy')
+    bpy.props = _Props('bpy.props')
+    bpy.app = types.ModuleType('bpy.app')
+    bpy.app.version = (4, 2, 0)
+    bpy.app.background = True
+    bpy.app.timers = _Timers()
+    bpy.app.handlers = types.ModuleType('bpy.app.handlers')
+    bpy.app.handlers.persistent = lambda function: function
+    for name in ('depsgraph_update_post', 'frame_change_post', 'undo_post', 'redo_post', 'load_post',
+                 'save_post'):
+        setattr(bpy.app.handlers, name, [])
+
+    bpy.types = types.ModuleType('bpy.types')
+    for name in ('Operator', 'Panel', 'PropertyGroup', 'WindowManager', 'Image', 'Palette'):
+        setattr(bpy.types, name, type(name, (_Struct,), {}))
+    for name in ('SpaceView3D', 'SpaceImageEditor', 'SpaceClipEditor'):
+        setattr(bpy.types, name, type(name, (_Space,), {}))
+    bpy.types.bpy_prop_collection = list
+
+    bpy.utils = types.ModuleType('bpy.utils')
+    bpy.utils.register_classes_factory = lambda classes: (lambda: None, lambda: None)
+    bpy.data = types.SimpleNamespace()
+    bpy.context = None
+
+    gpu = types.ModuleType('gpu')
+    gpu.state = types.SimpleNamespace(active_framebuffer_get=lambda: framebuffer,
+                                      viewport_get=lambda: framebuffer.viewport_get())
+    gpu.shader = types.SimpleNamespace(from_builtin=lambda name: None)
+
+    gpu_extras = types.ModuleType('gpu_extras')
+    gpu_extras.batch = types.ModuleType('gpu_extras.batch')
+    gpu_extras.batch.batch_for_shader = lambda *args, **kwargs: None
+
+    sys.modules.update({
+        'bpy': bpy,
+        'bpy.app': bpy.app,
+        'bpy.app.handlers': bpy.app.handlers,
+        'bpy.props': bpy.props,
+        'bpy.types': bpy.types,
+        'bpy.utils': bpy.utils,
+        'gpu': gpu,
+        'gpu_extras': gpu_extras,
+        'gpu_extras.batch': gpu_extras.batch,
+    })
+    return bpy
+
+
+def import_addon():
+    """Imports the addon as a package, the way Blender does"""
+    if ADDON_NAME in sys.modules:
+        return sys.modules[ADDON_NAME]
+
+    spec = importlib.util.spec_from_file_location(ADDON_NAME, os.path.join(ADDON_DIR, '__init__.py'),
+                                                  submodule_search_locations=[ADDON_DIR])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[ADDON_NAME] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeWindowManager(types.SimpleNamespace):
+    def __init__(self, addon, **overrides):
+        values = {name: prop[1].get('default') for name, prop in addon.window_manager_props}
+        values['picker_bindings'] = []
+        values['picker_monitor_regions'] = []
+        values.update(overrides)
+        super().__init__(**values)
+
+    def event_timer_add(self, time_step, window=None):
+        return object()
+
+    def event_timer_remove(self, timer):
+        pass
+
+    def modal_handler_add(self, operator):
+        pass
+
+
+def make_context(window_manager, space_type='SpaceView3D'):
+    noop = lambda *args, **kwargs: None
+    area = types.SimpleNamespace(tag_redraw=noop, header_text_set=noop, regions=[])
+    space_data = type(space_type, (), {'type': 'VIEW_3D', 'image': None})()
+    return types.SimpleNamespace(
+        window_manager=window_manager,
+        area=area,
+        region=types.SimpleNamespace(tag_redraw=noop),
+        window=types.SimpleNamespace(cursor_modal_set=noop, cursor_modal_restore=noop),
+        space_data=space_data,
+        scene=types.SimpleNamespace(view_settings=types.SimpleNamespace(use_hdr_view=False)),
+    )
+
+
+def make_event(event_type, x, y):
+    return types.SimpleNamespace(type=event_type, mouse_x=x, mouse_y=y, mouse_region_x=x, mouse_region_y=y)
@@ -0,0 +1,246 @@
+"""
+Headless benchmarks of the picking pipeline.
+
+Drives ScreenPickerOperator, ScreenRectOperator and the region monitor through scripted events
+against a synthetic framebuffer and writes per-phase latency percentiles,
+throughput and peak memory as JSON, to compare across commits:
+
+    python benchmarks/run_benchmarks.py --output before.json
+    python benchmarks/run_benchmarks.py --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import types
+
+import numpy as np
+
+import fake_blender
+
+TILE_SIZES = (3, 5, 10, 25, 50, 100)
+RECT_SIZES = ((64, 64), (256, 256), (1024, 1024), (1920, 1080), (3840, 2160), (7680, 4320))
+PICKER_EVENTS = 200
+READBACK_FORMATS = ('FLOAT', 'UBYTE')
+KERNEL_SHAPES = ('SQUARE', 'CIRCLE', 'GAUSSIAN')
+
+
+def summarize(operator, phase, size, durations, peak_bytes):
+    durations = np.asarray(durations) * 1000.0
+    return {
+        'operator': operator,
+        'phase': phase,
+        'size': list(size),
+        'count': len(durations),
+        'mean_ms': float(np.mean(durations)),
+        'p50_ms': float(np.percentile(durations, 50)),
+        'p95_ms': float(np.percentile(durations, 95)),
+        'p99_ms': float(np.percentile(durations, 99)),
+        'throughput_per_s': float(len(durations) / (np.sum(durations) / 1000.0)),
+        'peak_bytes': peak_bytes,
+    }
+
+
+def measure_peak(function):
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def cursor_path(count, width, height, seed=1):
+    """A random walk of small cursor moves, like a user hovering"""
+    rng = np.random.default_rng(seed)
+    steps = rng.integers(-4, 5, (count, 2))
+    path = np.cumsum(steps, axis=0) + (width // 2, height // 2)
+    return np.clip(path, 0, (width - 1, height - 1))
+
+
+def run_picker(addon, bpy, framebuffer, sqrt_length, **settings):
+    wm = fake_blender.FakeWindowManager(addon, picker_sample_rate=0, **settings)
+    context = fake_blender.make_context(wm)
+    bpy.context = context
+    operator_class = addon.operators.ScreenPickerOperator
+    path = cursor_path(PICKER_EVENTS, framebuffer.width, framebuffer.height)
+
+    def session(durations=None):
+        operator = operator_class()
+        operator.sqrt_length = sqrt_length
+        operator.reuse_padding = 0
+
+        start = time.perf_counter()
+        operator.invoke(context, fake_blender.make_event('MOUSEMOVE', *path[0]))
+        invoke_duration = time.perf_counter() - start
+
+        for x, y in path:
+            operator.scheduler.frame_drawn()
+            start = time.perf_counter()
+            operator.modal(context, fake_blender.make_event('MOUSEMOVE', int(x), int(y)))
+            if durations is not None:
+                durations.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        operator.modal(context, fake_blender.make_event('LEFTMOUSE', *path[-1]))
+        return invoke_duration, time.perf_counter() - start
+
+    durations = []
+    invoke_duration, commit_duration = session(durations)
+    peak = measure_peak(session)
+
+    size = (sqrt_length, sqrt_length)
+    return [
+        summarize('picker', 'invoke', size, [invoke_duration], peak),
+        summarize('picker', 'mousemove', size, durations, peak),
+        summarize('picker', 'commit', size, [commit_duration], peak),
+    ]
+
+
+def run_rect(addon, bpy, framebuffer, width, height, repeats, **settings):
+    wm = fake_blender.FakeWindowManager(addon, **settings)
+    context = fake_blender.make_context(wm)
+    bpy.context = context
+    operator_class = addon.operators.ScreenRectOperator
+
+    def pick():
+        operator = operator_class()
+        operator.invoke(context, fake_blender.make_event('MOUSEMOVE', 0, 0))
+        operator.modal(context, fake_blender.make_event('LEFTMOUSE', 0, 0))
+        operator.modal(context, fake_blender.make_event('RIGHTMOUSE', width - 1, height - 1))
+        # skip the wait for the outline to disappear
+        operator.finished -= 1.0
+
+        start = time.perf_counter()
+        operator.modal(context, fake_blender.make_event('TIMER', width - 1, height - 1))
+        bpy.app.timers.run_until_idle()
+        return time.perf_counter() - start
+
+    durations = [pick() for _ in range(repeats)]
+    peak = measure_peak(pick)
+    return [summarize('rect', 'pick', (width, height), durations, peak)]
+
+
+def run_monitor(addon, bpy, framebuffer, width, height, repeats, **settings):
+    """One pinned region checked while the screen stays the same, and while it keeps changing"""
+    region = types.SimpleNamespace(x=0, y=0, width=width, height=height, mean=(0.0,) * 3, std=(0.0,) * 3)
+    wm = fake_blender.FakeWindowManager(addon, picker_monitor_regions=[region], **settings)
+    context = fake_blender.make_context(wm)
+    bpy.context = context
+    operator = addon.operators.RegionMonitorOperator()
+    operator.invoke(context, fake_blender.make_event('TIMER', 0, 0))
+    first_pixel = framebuffer.pixels[0, 0].copy()
+
+    def tick(change=False):
+        if change:
+            # the first pixel is always part of the checksum
+            framebuffer.pixels[0, 0, 0] += 1
+        start = time.perf_counter()
+        operator.tick(wm)
+        return time.perf_counter() - start
+
+    try:
+        tick()
+        unchanged = [tick() for _ in range(repeats)]
+        changed = [tick(change=True) for _ in range(repeats)]
+        peak = measure_peak(lambda: tick(change=True))
+    finally:
+        framebuffer.pixels[0, 0] = first_pixel
+        operator.cancel(context)
+
+    return [
+        summarize('monitor', 'unchanged', (width, height), unchanged, peak),
+        summarize('monitor', 'changed', (width, height), changed, peak),
+    ]
+
+
+def run_all(args):
+    largest = [(w, h) for w, h in RECT_SIZES if w * h <= args.max_pixels]
+    fb_width = max(w for w, _ in largest)
+    fb_height = max(h for _, h in largest)
+
+    framebuffer = fake_blender.FakeFramebuffer(fb_width, fb_height)
+    bpy = fake_blender.install(framebuffer)
+    addon = fake_blender.import_addon()
+
+    results = []
+    for readback in READBACK_FORMATS:
+        for snapshot in (False, True):
+            for kernel in KERNEL_SHAPES:
+                settings = {'picker_use_snapshot': snapshot, 'picker_readback': readback, 'picker_kernel': kernel}
+                for sqrt_length in TILE_SIZES:
+                    for result in run_picker(addon, bpy, framebuffer, sqrt_length, **settings):
+                        result['settings'] = settings
+                        results.append(result)
+
+        for width, height in largest:
+            repeats = max(1, min(20, int(2e7 // (width * height))))
+            settings = {'picker_readback': readback}
+            for result in run_rect(addon, bpy, framebuffer, width, height, repeats, **settings):
+                result['settings'] = settings
+                results.append(result)
+            for result in run_monitor(addon, bpy, framebuffer, width, height, repeats, **settings):
+                result['settings'] = settings
+                results.append(result)
+
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=fake_blender.ADDON_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def result_key(result):
+    return result['operator'], result['phase'], tuple(result['size']), json.dumps(result['settings'], sort_keys=True)
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {result_key(r): r for r in json.load(f)['results']}
+
+    for result in results:
+        old = baseline.get(result_key(result))
+        if old is None or not old['p50_ms']:
+            continue
+        ratio = result['p50_ms'] / old['p50_ms']
+        print('{:>6} {:>9} {:>11} {:>28}  p50 {:9.3f} ms -> {:9.3f} ms  ({:+.0f}%)'.format(
+            result['operator'], result['phase'], 'x'.join(map(str, result['size'])), result_key(result)[3],
+            old['p50_ms'], result['p50_ms'], (ratio - 1.0) * 100.0), file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', help='JSON file to write, defaults to stdout')
+    parser.add_argument('--compare', help='earlier JSON output to compare median latencies against')
+    parser.add_argument('--max-pixels', type=int, default=7680 * 4320,
+                        help='skip rectangles larger than this many pixels')
+    args = parser.parse_args()
+
+    report = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'results': run_all(args),
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.compare:
+        compare(report['results'], args.compare)
+
+
+if __name__ == '__main__':
+    main()
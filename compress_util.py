@@ -4,12 +4,14 @@ import zipfile
 import ast
 
 allowed_file_extensions = {'.py', '.md', '.toml', 'LICENSE'}
+excluded_directories = {'benchmarks'}
 
 log = logging.getLogger(__name__)
 
 
 def zipdir(path, ziph: zipfile.ZipFile, zip_subdir_name):
     for root, dirs, files in os.walk(path):
+        dirs[:] = [d for d in dirs if d not in excluded_directories]
         for file in files:
             if any(file.endswith(ext) for ext in allowed_file_extensions):
                 orig_hier = os.path.join(root, file)
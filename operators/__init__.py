@@ -1,9 +1,103 @@
 import bpy
+from bpy.app.handlers import persistent
 
 from .screen_rect import ScreenRectOperator
 from .screen_picker import ScreenPickerOperator
-from .copy_color import CopyColorOperator, ClearUpdateOperator
+from .debug import DumpTraceOperator, ClearTimingsOperator
+from .checker import CopyPatchOperator, ExportPatchesOperator
+from .sequence_stats import SequenceStatsOperator
+from .recall import RecallPickOperator, ExportHistoryOperator, ClearHistoryOperator, sync_history_file
+from .region_monitor import MonitorRegion, RegionMonitorOperator, UnpinRegionOperator, monitor_session
+from .copy_color import ColorBinding, CopyColorOperator, ClearUpdateOperator, clear_target_cache, target_propagator
+from . import worker
+from .lazy import loaded
+from .scheduler import mark_content_changed
 
-_classes_to_register = [ScreenRectOperator, ScreenPickerOperator, CopyColorOperator, ClearUpdateOperator]
+_classes_to_register = [ColorBinding, MonitorRegion, ScreenRectOperator, ScreenPickerOperator, CopyColorOperator,
+                        ClearUpdateOperator, DumpTraceOperator, ClearTimingsOperator, CopyPatchOperator,
+                        ExportPatchesOperator, SequenceStatsOperator, RecallPickOperator, ExportHistoryOperator,
+                        ClearHistoryOperator, RegionMonitorOperator, UnpinRegionOperator]
 
-register, unregister = bpy.utils.register_classes_factory(_classes_to_register)
+_register_classes, _unregister_classes = bpy.utils.register_classes_factory(_classes_to_register)
+
+
+def release_helpers():
+    """Drops the cached pixels, chart and history of helpers that were loaded"""
+    images, patches, history = loaded('image_cache'), loaded('patches'), loaded('history')
+    if images is not None:
+        images.image_cache.invalidate()
+    if patches is not None:
+        patches.patch_table.clear()
+    if history is not None:
+        # the picks of the previous file stay in its sidecar, if it had one
+        history.pick_history.detach()
+        history.pick_history.clear()
+
+
+@persistent
+def on_depsgraph_update(scene, depsgraph):
+    mark_content_changed()
+    images = loaded('image_cache')
+    if images is None:
+        return
+    for update in depsgraph.updates:
+        if isinstance(update.id, bpy.types.Image):
+            images.image_cache.invalidate(update.id.name_full)
+
+
+@persistent
+def on_frame_change(*_args):
+    mark_content_changed()
+
+
+@persistent
+def on_undo_redo(*_args):
+    mark_content_changed()
+    # undo and redo rebuild the data, leaving the resolved targets pointing at freed structs
+    clear_target_cache()
+    # undoing a paint stroke restores pixels without an image update
+    images = loaded('image_cache')
+    if images is not None:
+        images.image_cache.invalidate()
+
+
+@persistent
+def on_load_post(*_args):
+    target_propagator.cancel()
+    # loading a file ends every modal operator, the monitor included
+    monitor_session.reset()
+    clear_target_cache()
+    release_helpers()
+    sync_history_file(bpy.context.window_manager)
+
+
+@persistent
+def on_save_post(*_args):
+    # a file saved for the first time, or under a new name, gets its own sidecar
+    sync_history_file(bpy.context.window_manager)
+
+
+def register():
+    _register_classes()
+    bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update)
+    bpy.app.handlers.frame_change_post.append(on_frame_change)
+    bpy.app.handlers.undo_post.append(on_undo_redo)
+    bpy.app.handlers.redo_post.append(on_undo_redo)
+    bpy.app.handlers.load_post.append(on_load_post)
+    bpy.app.handlers.save_post.append(on_save_post)
+
+
+def unregister():
+    for handler_list, handler in ((bpy.app.handlers.depsgraph_update_post, on_depsgraph_update),
+                                  (bpy.app.handlers.frame_change_post, on_frame_change),
+                                  (bpy.app.handlers.undo_post, on_undo_redo),
+                                  (bpy.app.handlers.redo_post, on_undo_redo),
+                                  (bpy.app.handlers.load_post, on_load_post),
+                                  (bpy.app.handlers.save_post, on_save_post)):
+        if handler in handler_list:
+            handler_list.remove(handler)
+    monitor_session.stop_requested = True
+    target_propagator.cancel()
+    release_helpers()
+    worker.shutdown()
+    _unregister_classes()
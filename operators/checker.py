@@ -0,0 +1,63 @@
+import bpy
+
+from .lazy import loaded
+from .publish import publish
+
+
+def sampled_patches():
+    """Number of patches of the last sampled chart, without importing the patch helpers"""
+    patches = loaded('patches')
+    return 0 if patches is None else len(patches.patch_table)
+
+
+class CopyPatchOperator(bpy.types.Operator):
+    bl_idname = 'wm.color_picker_pro_copy_patch'
+    bl_label = 'Use Patch'
+    bl_description = 'Copy the statistics of a sampled patch to the picker results, updating bound properties'
+
+    index: bpy.props.IntProperty(name='Patch', min=0, options={'SKIP_SAVE'})
+
+    @classmethod
+    def poll(cls, context):
+        return sampled_patches() > 0
+
+    def execute(self, context):
+        from .patches import patch_table
+
+        if self.index >= len(patch_table):
+            self.report({'ERROR'}, 'Only {} patches were sampled'.format(len(patch_table)))
+            return {'CANCELLED'}
+
+        publish(context.window_manager, patch_table.colors(self.index), commit=True)
+        return {'FINISHED'}
+
+
+class ExportPatchesOperator(bpy.types.Operator):
+    bl_idname = 'wm.color_picker_pro_export_patches'
+    bl_label = 'Export Patches'
+    bl_description = 'Save the statistics of every sampled patch as a CSV file'
+
+    filepath: bpy.props.StringProperty(subtype='FILE_PATH', options={'SKIP_SAVE'})
+    filter_glob: bpy.props.StringProperty(default='*.csv', options={'HIDDEN'})
+
+    @classmethod
+    def poll(cls, context):
+        return sampled_patches() > 0
+
+    def invoke(self, context, event):
+        if not self.filepath:
+            self.filepath = 'color_picker_pro_patches.csv'
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        from .patches import patch_table
+
+        try:
+            patch_table.write_csv(bpy.path.abspath(self.filepath))
+        except OSError as e:
+            self.report({'ERROR'}, 'Failed to save patches: {}'.format(e))
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, 'Saved {} patches to {}'.format(len(patch_table), self.filepath))
+        return {'FINISHED'}
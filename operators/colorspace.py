@@ -0,0 +1,95 @@
+import numpy as np
+
+# entries of the float lookup tables over [0, 1], interpolated linearly in between
+LUT_SIZE = 4096
+
+
+def srgb_to_linear_exact(values):
+    values = np.asarray(values, dtype=np.float64)
+    return np.where(values <= 0.04045, values / 12.92, ((np.maximum(values, 0.04045) + 0.055) / 1.055) ** 2.4)
+
+
+def linear_to_srgb_exact(values):
+    values = np.asarray(values, dtype=np.float64)
+    return np.where(values <= 0.0031308, values * 12.92,
+                    1.055 * np.maximum(values, 0.0031308) ** (1.0 / 2.4) - 0.055)
+
+
+_LUT_INPUTS = np.linspace(0.0, 1.0, LUT_SIZE)
+_SRGB_TO_LINEAR = srgb_to_linear_exact(_LUT_INPUTS)
+_LINEAR_TO_SRGB = linear_to_srgb_exact(_LUT_INPUTS)
+
+# exact decoding of 8-bit display values
+SRGB_BYTE_TO_LINEAR = srgb_to_linear_exact(np.arange(256) / 255.0).astype(np.float32)
+
+
+def _apply_lut(values, lut, exact):
+    values = np.asarray(values, dtype=np.float64)
+    result = np.interp(values, _LUT_INPUTS, lut)
+    outside = (values < 0.0) | (values > 1.0)
+    if np.any(outside):
+        result[outside] = exact(values[outside])
+    return result
+
+
+def srgb_to_linear(values):
+    """Display sRGB values to scene-linear through the lookup table, computed exactly outside [0, 1]"""
+    values = np.asarray(values)
+    if values.dtype == np.uint8:
+        return SRGB_BYTE_TO_LINEAR[values]
+    return _apply_lut(values, _SRGB_TO_LINEAR, srgb_to_linear_exact)
+
+
+def linear_to_srgb(values):
+    """Scene-linear values to display sRGB through the lookup table, computed exactly outside [0, 1]"""
+    return _apply_lut(values, _LINEAR_TO_SRGB, linear_to_srgb_exact)
+
+
+def rgb_to_hsv(rgb):
+    """(..., 3) RGB to hue, saturation and value, hue in [0, 1) like colorsys"""
+    rgb = np.asarray(rgb, dtype=np.float64)
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    value = np.max(rgb, axis=-1)
+    delta = value - np.min(rgb, axis=-1)
+
+    safe_delta = np.where(delta > 0.0, delta, 1.0)
+    hue = np.where(value == r, (g - b) / safe_delta,
+                   np.where(value == g, 2.0 + (b - r) / safe_delta, 4.0 + (r - g) / safe_delta))
+    hue = np.where(delta > 0.0, (hue / 6.0) % 1.0, 0.0)
+    saturation = np.where(value > 0.0, delta / np.where(value > 0.0, value, 1.0), 0.0)
+    return np.stack((hue, saturation, value), axis=-1)
+
+
+# linear Rec.709 primaries to CIE XYZ, D65 white
+_RGB_TO_XYZ = np.array([[0.4124564, 0.3575761, 0.1804375],
+                        [0.2126729, 0.7151522, 0.0721750],
+                        [0.0193339, 0.1191920, 0.9503041]])
+_D65_WHITE = _RGB_TO_XYZ.sum(axis=1)
+
+
+def linear_to_lab(rgb):
+    """(..., 3) scene-linear Rec.709 RGB to CIELAB, D65 white"""
+    xyz = np.asarray(rgb, dtype=np.float64) @ _RGB_TO_XYZ.T / _D65_WHITE
+    epsilon = (6.0 / 29.0) ** 3
+    f = np.where(xyz > epsilon, np.cbrt(xyz), xyz / (3.0 * (6.0 / 29.0) ** 2) + 4.0 / 29.0)
+
+    lightness = 116.0 * f[..., 1] - 16.0
+    a = 500.0 * (f[..., 0] - f[..., 1])
+    b = 200.0 * (f[..., 1] - f[..., 2])
+    return np.stack((lightness, a, b), axis=-1)
+
+
+def to_subtypes(colors, subtypes, sources, scene_linear=False):
+    """Converts (n, 3) picker statistics, named by sources, for properties of the given subtypes.
+
+    Display-referred colors are converted for COLOR properties, which are scene-linear, and
+    scene-linear colors for COLOR_GAMMA properties, each group in one lookup. Everything else
+    takes the values as they are, as do standard deviations, which are spreads rather than colors.
+    """
+    colors = np.array(colors, dtype=np.float64).reshape((-1, 3))
+    converted = np.array([subtype == ('COLOR_GAMMA' if scene_linear else 'COLOR') and source != 'picker_std'
+                          for subtype, source in zip(subtypes, sources)], dtype=bool)
+    if np.any(converted):
+        convert = linear_to_srgb if scene_linear else srgb_to_linear
+        colors[converted] = convert(colors[converted])
+    return colors
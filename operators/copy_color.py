@@ -1,9 +1,25 @@
 import logging
+import math
+import time
 
 import bpy
 
+from .profiling import profiler
+from .stat_names import STAT_NAMES
+
 logger = logging.getLogger(__name__)
 
+picker_items = [
+    ('picker_max', 'Max', ''),
+    ('picker_p95', '95th Percentile', ''),
+    ('picker_mean', 'Mean', ''),
+    ('picker_trimmed', 'Trimmed Mean', ''),
+    ('picker_median', 'Median', ''),
+    ('picker_p05', '5th Percentile', ''),
+    ('picker_min', 'Min', ''),
+    ('picker_std', 'Standard Deviation', ''),
+]
+
 
 def get_property_data(data, attr):
     """Gets bl_rna properties from the given attribute"""
@@ -31,15 +47,22 @@ def is_valid_color_property(window_manager, full_path):
 
     try:
         data_eval = eval(data, {'bpy': bpy}, {})  # prevents anything non-bpy from being used
-    except (SyntaxError, AttributeError) as e:
+    except (SyntaxError, AttributeError, KeyError) as e:
         report_type, report_message = {'ERROR'}, 'Data property evaluation failed'
         logger.error(str(e))
         return valid, report_type, report_message
 
-    if data_eval == window_manager and attr in ('picker_max', 'picker_min', 'picker_median', 'picker_mean'):
+    if data_eval == window_manager and attr in STAT_NAMES:
         report_type, report_message = {'ERROR'}, 'Cannot update itself, aborting'
         return valid, report_type, report_message
 
+    if isinstance(data_eval, bpy.types.bpy_prop_collection):
+        # every item of a collection is updated at once, so check the property on its first item
+        if len(data_eval) == 0:
+            report_type, report_message = {'ERROR'}, 'Collection is empty'
+            return valid, report_type, report_message
+        data_eval = data_eval[0]
+
     prop_properties = get_property_data(data_eval, attr)
     if prop_properties is not None:
         data_prop_str_type = prop_properties.__class__.__name__
@@ -51,8 +74,10 @@ def is_valid_color_property(window_manager, full_path):
             valid = True
 
     if valid:
-        if 'COLOR_GAMMA' != prop_properties.subtype:
-            report_type, report_message = {'WARNING'}, ('Target property is not gamma corrected, '
+        if 'COLOR' == prop_properties.subtype:
+            report_type, report_message = {'INFO'}, 'Target property is scene-linear, values will be converted'
+        elif 'COLOR_GAMMA' != prop_properties.subtype:
+            report_type, report_message = {'WARNING'}, ('Target property is not a color, '
                                                         'result may be unexpected')
         else:
             report_type, report_message = {'INFO'}, 'Color Picker Pro will now update ' + prop_properties.name
@@ -60,6 +85,168 @@ def is_valid_color_property(window_manager, full_path):
     return valid, report_type, report_message
 
 
+class ColorTarget:
+    """A color property path resolved once into its owning data and attribute.
+
+    If the data is a collection, the property is set on every item with one foreach_set.
+    The property subtype decides which color space is written.
+    """
+
+    def __init__(self, full_path):
+        data_path, self.attr = full_path.rsplit('.', maxsplit=1)
+        self.full_path = full_path
+        self.data = eval(data_path, {'bpy': bpy}, {})
+        self.is_collection = isinstance(self.data, bpy.types.bpy_prop_collection)
+        self.id_data = self.data.id_data
+        self.id_name = self._id_name()
+
+        item = self.data[0] if self.is_collection else self.data
+        self.subtype = get_property_data(item, self.attr).subtype
+
+    def _id_name(self):
+        return None if self.id_data is None else self.id_data.name
+
+    def is_alive(self):
+        """False once the owning datablock has been removed or renamed"""
+        try:
+            return self._id_name() == self.id_name
+        except ReferenceError:
+            return False
+
+    def write(self, color):
+        if not self.is_collection:
+            getattr(self.data, self.attr)[:3] = color[:3]
+            return
+
+        import numpy as np
+
+        count = len(self.data)
+        if count == 0:
+            return
+        channels = len(getattr(self.data[0], self.attr))
+        values = np.empty(count * channels, dtype=np.float32)
+        self.data.foreach_get(self.attr, values)
+        values.reshape((count, channels))[:, :3] = color[:3]
+        self.data.foreach_set(self.attr, values)
+
+
+_target_cache = {}
+
+
+def clear_target_cache():
+    _target_cache.clear()
+
+
+def resolve_target(window_manager, full_path):
+    """Returns the cached target for a data path, validating and resolving it again if it went stale"""
+    target = _target_cache.get(full_path)
+    if target is not None and target.is_alive():
+        return target
+
+    _target_cache.pop(full_path, None)
+    valid, _report_type, report_message = is_valid_color_property(window_manager, full_path)
+    if not valid:
+        logger.warning('Color Picker Pro cannot update {}: {}'.format(full_path, report_message))
+        return None
+
+    target = ColorTarget(full_path)
+    _target_cache[full_path] = target
+    return target
+
+
+def write_bindings(window_manager):
+    """Copies each binding's picker statistic to its target, removing bindings whose target is gone.
+
+    Colors are converted to each target's color space together, then the writes are grouped by
+    datablock, which is tagged for update once after its collection writes.
+    """
+    from .colorspace import to_subtypes
+
+    bindings = window_manager.picker_bindings
+    targets = []
+    sources = []
+    colors = []
+    stale_indices = []
+
+    for index, binding in enumerate(bindings):
+        target = resolve_target(window_manager, binding.data_path)
+        if target is None:
+            stale_indices.append(index)
+            continue
+        targets.append(target)
+        sources.append(binding.source)
+        colors.append(tuple(getattr(window_manager, binding.source))[:3])
+
+    writes_by_id = {}
+    if targets:
+        converted = to_subtypes(colors, [target.subtype for target in targets], sources,
+                                window_manager.picker_scene_linear)
+        for target, color in zip(targets, converted):
+            writes_by_id.setdefault(target.id_data, []).append((target, tuple(color)))
+
+    for id_data, writes in writes_by_id.items():
+        for target, color in writes:
+            target.write(color)
+        if id_data is not None and any(target.is_collection for target, _ in writes):
+            id_data.update_tag()
+
+    for index in reversed(stale_indices):
+        bindings.remove(index)
+
+
+class TargetPropagator:
+    """Debounces writes to the bound targets while a picker is live.
+
+    Writes happen at most picker_update_rate times per second, with a timer writing the
+    latest value after the last change, and flush always writes immediately.
+    """
+
+    def __init__(self):
+        self.last_write = -math.inf
+        self.timer_registered = False
+        # timers are matched by identity, so the same bound method must be reused
+        self._timer_callback = self._flush_from_timer
+
+    def request(self, window_manager):
+        rate = window_manager.picker_update_rate
+        wait = (self.last_write + 1.0 / rate - time.perf_counter()) if rate > 0 else 0.0
+
+        if wait <= 0.0:
+            self.flush(window_manager)
+        elif not self.timer_registered:
+            self.timer_registered = True
+            bpy.app.timers.register(self._timer_callback, first_interval=wait)
+
+    def _flush_from_timer(self):
+        self.timer_registered = False
+        self.flush(bpy.context.window_manager)
+        return None
+
+    def flush(self, window_manager):
+        self.cancel()
+        self.last_write = time.perf_counter()
+        with profiler.phase('propagate'):
+            write_bindings(window_manager)
+
+    def cancel(self):
+        if self.timer_registered and bpy.app.timers.is_registered(self._timer_callback):
+            bpy.app.timers.unregister(self._timer_callback)
+        self.timer_registered = False
+
+
+target_propagator = TargetPropagator()
+
+
+class ColorBinding(bpy.types.PropertyGroup):
+    data_path: bpy.props.StringProperty(name='Data path')
+
+    source: bpy.props.EnumProperty(
+        name='Picker',
+        default='picker_median',
+        items=picker_items
+    )
+
+
 class CopyColorOperator(bpy.types.Operator):
     bl_idname = 'wm.color_picker_pro_copy_update'
     bl_label = 'Update Color'
@@ -67,12 +254,7 @@ class CopyColorOperator(bpy.types.Operator):
     picker_type: bpy.props.EnumProperty(
         name='Picker',
         default='picker_median',
-        items=[
-            ('picker_max', 'Max', ''),
-            ('picker_mean', 'Mean', ''),
-            ('picker_median', 'Median', ''),
-            ('picker_min', 'Min', ''),
-        ]
+        items=picker_items
     )
 
     prop_to_update: bpy.props.StringProperty(
@@ -95,8 +277,12 @@ class CopyColorOperator(bpy.types.Operator):
             self.report(report_type, report_message)
             return {'CANCELLED'}
 
-        window_manager.update_target = self.prop_to_update
-        window_manager.update_source = self.picker_type
+        _target_cache.pop(self.prop_to_update, None)
+        binding = next((b for b in window_manager.picker_bindings if b.data_path == self.prop_to_update), None)
+        if binding is None:
+            binding = window_manager.picker_bindings.add()
+            binding.data_path = self.prop_to_update
+        binding.source = self.picker_type
 
         self.report(report_type, report_message)
 
@@ -106,16 +292,26 @@ class CopyColorOperator(bpy.types.Operator):
 class ClearUpdateOperator(bpy.types.Operator):
     bl_idname = 'wm.color_picker_pro_clear'
     bl_label = 'Clear Updates'
-    bl_description = 'Stop further updates to custom property'
+    bl_description = 'Stop further updates to custom properties'
+
+    # binding to remove, -1 removes all of them
+    index: bpy.props.IntProperty(default=-1, options={'SKIP_SAVE'})
 
     @classmethod
     def poll(cls, context):
-        return context.window_manager.update_target or context.window_manager.update_source
+        return len(context.window_manager.picker_bindings) > 0
 
     def execute(self, context):
         window_manager = context.window_manager
-        window_manager.update_target = ''
-        window_manager.update_source = ''
-        self.report({'INFO'}, 'Color updates cleared')
+        target_propagator.cancel()
+
+        if self.index < 0:
+            clear_target_cache()
+            window_manager.picker_bindings.clear()
+            self.report({'INFO'}, 'Color updates cleared')
+        elif self.index < len(window_manager.picker_bindings):
+            _target_cache.pop(window_manager.picker_bindings[self.index].data_path, None)
+            window_manager.picker_bindings.remove(self.index)
+            self.report({'INFO'}, 'Color update cleared')
 
         return {'FINISHED'}
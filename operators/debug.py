@@ -0,0 +1,38 @@
+import bpy
+
+from .profiling import profiler
+
+
+class DumpTraceOperator(bpy.types.Operator):
+    bl_idname = 'wm.color_picker_pro_dump_trace'
+    bl_label = 'Save Trace'
+    bl_description = 'Save the recorded picker timings as a Chrome trace file'
+
+    filepath: bpy.props.StringProperty(subtype='FILE_PATH', options={'SKIP_SAVE'})
+    filter_glob: bpy.props.StringProperty(default='*.json', options={'HIDDEN'})
+
+    def invoke(self, context, event):
+        if not self.filepath:
+            self.filepath = 'color_picker_pro_trace.json'
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        try:
+            event_count = profiler.dump_trace(bpy.path.abspath(self.filepath))
+        except OSError as e:
+            self.report({'ERROR'}, 'Failed to save trace: {}'.format(e))
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, 'Saved {} timings to {}'.format(event_count, self.filepath))
+        return {'FINISHED'}
+
+
+class ClearTimingsOperator(bpy.types.Operator):
+    bl_idname = 'wm.color_picker_pro_clear_timings'
+    bl_label = 'Clear Timings'
+    bl_description = 'Discard the recorded picker timings'
+
+    def execute(self, context):
+        profiler.clear()
+        return {'FINISHED'}
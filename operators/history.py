@@ -0,0 +1,108 @@
+import os
+import time
+
+import numpy as np
+
+from .stats import STAT_NAMES, write_stats_csv
+
+# picks kept before the oldest ones are overwritten
+HISTORY_SIZE = 4096
+
+# one record per pick, `pick` counts every pick ever recorded and is -1 for empty slots,
+# `scene_linear` tells scene-linear image values from display-referred screen colors
+HISTORY_DTYPE = np.dtype([('pick', np.int64), ('time', np.float64),
+                          ('x', np.int32), ('y', np.int32), ('width', np.int32), ('height', np.int32),
+                          ('scene_linear', np.bool_)]
+                         + [(name, np.float32, 3) for name in STAT_NAMES])
+
+
+def empty_records(capacity):
+    records = np.zeros(capacity, dtype=HISTORY_DTYPE)
+    records['pick'] = -1
+    return records
+
+
+class PickHistory:
+    """Ring buffer of the statistics of every committed pick in one preallocated structured array.
+
+    Appending writes one slot in place. The array can be swapped for a memory-mapped NPY file,
+    so the history of a blend file survives restarts without being saved explicitly.
+    """
+
+    def __init__(self, capacity=HISTORY_SIZE):
+        self.capacity = capacity
+        self.filepath = None
+        self.clear()
+
+    def clear(self):
+        self.count = 0
+        if self.filepath is None:
+            self._records = empty_records(self.capacity)
+        else:
+            self._records[:] = empty_records(self.capacity)
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, results, x, y, width, height, scene_linear=False):
+        """Records picker statistics keyed like compute_stats, of a width x height area at window pixel (x, y)"""
+        record = self._records[self.count % self.capacity]
+        record['pick'] = self.count
+        record['time'] = time.time()
+        record['x'], record['y'], record['width'], record['height'] = x, y, width, height
+        record['scene_linear'] = scene_linear
+        for name in STAT_NAMES:
+            record[name] = results[name]
+        self.count += 1
+
+    def records(self):
+        """Copy of the recorded picks, oldest first"""
+        start = self.count % self.capacity if self.count > self.capacity else 0
+        return np.concatenate((self._records[start:len(self)], self._records[:start]))
+
+    def recall(self, age):
+        """Statistics of an earlier pick keyed by window manager property, 0 being the latest,
+        and whether they are scene-linear"""
+        if not 0 <= age < len(self):
+            raise IndexError('Only {} picks are recorded'.format(len(self)))
+        record = self._records[(self.count - 1 - age) % self.capacity]
+        return {name: record[name] for name in STAT_NAMES}, bool(record['scene_linear'])
+
+    def write_csv(self, filepath):
+        records = self.records()
+        names = ('pick', 'time', 'x', 'y', 'width', 'height', 'scene_linear')
+        write_stats_csv(filepath, records, [records[name] for name in names], names,
+                        ('%d', '%.3f', '%d', '%d', '%d', '%d', '%d'))
+
+    def attach(self, filepath):
+        """Keeps the history in a memory-mapped NPY file.
+
+        An existing file's picks replace the ones in memory, a new file starts with them.
+        Raises ValueError if the file holds a different layout, leaving the history as it was.
+        """
+        if os.path.exists(filepath):
+            records = np.lib.format.open_memmap(filepath, mode='r+')
+            if records.dtype != HISTORY_DTYPE or records.shape != (self.capacity,):
+                del records
+                raise ValueError('"{}" is not a pick history of this version'.format(filepath))
+            count = int(records['pick'].max()) + 1
+        else:
+            records = np.lib.format.open_memmap(filepath, mode='w+', dtype=HISTORY_DTYPE, shape=(self.capacity,))
+            records[:] = self._records
+            count = self.count
+
+        self.detach()
+        self._records = records
+        self.count = count
+        self.filepath = filepath
+
+    def detach(self):
+        """Flushes a memory-mapped file and goes on with a copy of its picks in memory"""
+        if self.filepath is None:
+            return
+        self._records.flush()
+        self._records = np.array(self._records)
+        self.filepath = None
+
+
+pick_history = PickHistory()
@@ -0,0 +1,89 @@
+from collections import OrderedDict
+
+import numpy as np
+
+# total size of cached image pixels before least recently used images are dropped
+MEMORY_BUDGET = 1024 * 1024 * 1024
+
+
+def image_signature(image):
+    """Properties of an image that change when it is reloaded, resized or replaced"""
+    return image.filepath_raw, image.source, tuple(image.size), image.channels
+
+
+class ImagePixelCache:
+    """Least recently used cache of image pixels as (height, width, channels) float32 arrays.
+
+    Images are read once with foreach_get, then every sample is a NumPy slice.
+    Entries are dropped when their signature changes or when invalidated by a handler on an
+    image update, undo or redo, and the oldest ones are evicted once the cache exceeds its memory budget.
+    """
+
+    def __init__(self, budget=MEMORY_BUDGET):
+        self.budget = budget
+        self.size_bytes = 0
+        self._entries = OrderedDict()
+
+    def get(self, image):
+        key = image.name_full
+        signature = image_signature(image)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] == signature:
+                self._entries.move_to_end(key)
+                return entry[1]
+            self.invalidate(key)
+
+        width, height = image.size
+        channels = image.channels
+        pixels = np.empty(width * height * channels, dtype=np.float32)
+        image.pixels.foreach_get(pixels)
+        pixels = pixels.reshape((height, width, channels))
+
+        self._entries[key] = (signature, pixels)
+        self.size_bytes += pixels.nbytes
+
+        # always keep the newest image, even if it alone exceeds the budget
+        while self.size_bytes > self.budget and len(self._entries) > 1:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.size_bytes -= evicted.nbytes
+
+        return pixels
+
+    def invalidate(self, key=None):
+        """Drops one image by its full name, or every image"""
+        if key is None:
+            self._entries.clear()
+            self.size_bytes = 0
+            return
+
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= entry[1].nbytes
+
+
+def image_tile(pixels, x, y, size):
+    """Square tile of RGB pixels around image pixel (x, y), clamped inside the image.
+
+    Returns the (size, size, 3) tile and the position of (x, y) inside it.
+    """
+    height, width, channels = pixels.shape
+    size = min(size, width, height)
+    distance = size // 2
+
+    tile_x = min(max(x - distance, 0), width - size)
+    tile_y = min(max(y - distance, 0), height - size)
+    tile = pixels[tile_y:tile_y + size, tile_x:tile_x + size]
+
+    if channels >= 3:
+        tile = tile[:, :, :3]
+    else:
+        tile = np.repeat(tile[:, :, :1], 3, axis=2)
+
+    cursor_x = min(max(x - tile_x, 0), size - 1)
+    cursor_y = min(max(y - tile_y, 0), size - 1)
+    return tile, (cursor_x, cursor_y)
+
+
+image_cache = ImagePixelCache()
@@ -0,0 +1,98 @@
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from .stat_names import STAT_NAMES
+from .stats import BYTE_VALUES, TRIM_PERCENT, to_float
+
+# standard deviation of the Gaussian kernel as a share of its radius, leaving about 13% weight at the edge
+GAUSSIAN_SIGMA = 0.5
+
+# kernels kept per (shape, size), enough for every size a session hovers with
+KERNEL_CACHE_SIZE = 32
+
+Kernel = namedtuple('Kernel', ('indices', 'weights'))
+
+
+@lru_cache(maxsize=KERNEL_CACHE_SIZE)
+def kernel(shape, size):
+    """Weights of a CIRCLE or GAUSSIAN kernel over a size x size tile.
+
+    The kernel covers the disc inscribed in the tile. Returns the row-major indices of the
+    pixels inside it and their weights, which sum to 1. The arrays are shared, so read-only.
+    """
+    radius = size / 2.0
+    offsets = np.arange(size) + 0.5 - radius
+    distances = (offsets[:, np.newaxis] ** 2 + offsets[np.newaxis, :] ** 2).reshape(-1)
+
+    indices = np.flatnonzero(distances <= radius * radius)
+    if shape == 'GAUSSIAN':
+        sigma = radius * GAUSSIAN_SIGMA
+        weights = np.exp(-distances[indices] / (2.0 * sigma * sigma))
+    elif shape == 'CIRCLE':
+        weights = np.ones(len(indices))
+    else:
+        raise ValueError('Unknown kernel shape "{}"'.format(shape))
+
+    weights /= weights.sum()
+    indices.setflags(write=False)
+    weights.setflags(write=False)
+    return Kernel(indices, weights)
+
+
+def weighted_order_stats(values, weights):
+    """Median, percentiles and trimmed mean of ascending (columns, n) values with weights summing to 1 per column.
+
+    A percentile is the first value whose cumulative weight reaches it, and the trimmed mean
+    keeps the share of each value's weight between the trim bounds, like histogram_stats.
+    """
+    cumulative = np.cumsum(weights, axis=1)
+
+    def quantile(q):
+        ranks = [min(np.searchsorted(c, q), len(c) - 1) for c in cumulative]
+        return values[np.arange(len(values)), ranks]
+
+    trim = TRIM_PERCENT / 100.0
+    kept = np.clip(np.minimum(cumulative, 1.0 - trim) - np.maximum(cumulative - weights, trim), 0.0, None)
+    return {
+        'picker_p05': quantile(0.05),
+        'picker_p95': quantile(0.95),
+        'picker_trimmed': np.sum(kept * values, axis=1) / (1.0 - 2.0 * trim),
+        'picker_median': quantile(0.5),
+    }
+
+
+def kernel_stats(tile, shape, extremes='CHANNEL'):
+    """Picker statistics of a (size, size, 3) tile weighted by a kernel, in the form of compute_stats.
+
+    The mean, standard deviation, median, percentiles and trimmed mean are weighted,
+    max and min are taken over the pixels inside the kernel. 8-bit tiles are counted in
+    weighted 256-bin histograms, others sorted per channel.
+    """
+    indices, weights = kernel(shape, tile.shape[0])
+    pixels = tile.reshape((-1, 3))[indices]
+
+    if pixels.dtype == np.uint8:
+        histogram = np.stack([np.bincount(pixels[:, channel], weights=weights, minlength=256)
+                              for channel in range(3)])
+        results = weighted_order_stats(np.broadcast_to(BYTE_VALUES, histogram.shape), histogram)
+        mean, squares = histogram @ BYTE_VALUES, histogram @ (BYTE_VALUES * BYTE_VALUES)
+        pixels = to_float(pixels)
+    else:
+        pixels = np.asarray(pixels, dtype=np.float32)
+        order = np.argsort(pixels, axis=0).T
+        results = weighted_order_stats(np.take_along_axis(pixels.T, order, axis=1), weights[order])
+        mean, squares = weights @ pixels, weights @ (pixels * pixels)
+
+    results['picker_mean'] = mean
+    results['picker_std'] = np.sqrt(np.maximum(squares - mean * mean, 0.0))
+
+    if extremes == 'BRIGHTNESS':
+        dot = np.sum(pixels, axis=1)
+        results['picker_max'] = pixels[np.argmax(dot)]
+        results['picker_min'] = pixels[np.argmin(dot)]
+    else:
+        results['picker_max'] = np.max(pixels, axis=0)
+        results['picker_min'] = np.min(pixels, axis=0)
+    return {name: results[name] for name in STAT_NAMES}
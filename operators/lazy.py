@@ -0,0 +1,10 @@
+import sys
+
+
+def loaded(name):
+    """The helper module operators/<name>.py if an operator already imported it, or None.
+
+    Helpers that import NumPy are only imported when an operator runs, so handlers and panels
+    use this to reach their state without importing them at startup.
+    """
+    return sys.modules.get('{}.{}'.format(__package__, name))
@@ -0,0 +1,76 @@
+import math
+import time
+import zlib
+
+import numpy as np
+
+from .profiling import profiler
+from .readback import read_rgb
+from .stats import compute_stats
+
+# pixels of a region that go into its checksum, spread evenly over it
+FINGERPRINT_PIXELS = 4096
+
+
+def fingerprint(pixels):
+    """Checksum of an evenly strided subsample of (height, width, 3) pixels.
+
+    Renders that are still converging change nearly every pixel, so a subsample notices them
+    at a fraction of the cost of the statistics.
+    """
+    height, width = pixels.shape[:2]
+    step = max(1, math.ceil(math.sqrt(height * width / FINGERPRINT_PIXELS)))
+    return zlib.crc32(np.ascontiguousarray(pixels[::step, ::step]))
+
+
+def clamp_bounds(bounds, viewport):
+    """(x, y, width, height) bounds clamped inside the framebuffer's (min_x, min_y, max_x, max_y) viewport"""
+    x, y, width, height = bounds
+    min_x, min_y, max_x, max_y = viewport
+    start_x, start_y = min(max(x, min_x), max_x - 1), min(max(y, min_y), max_y - 1)
+    end_x, end_y = min(max(x + width, start_x + 1), max_x), min(max(y + height, start_y + 1), max_y)
+    return start_x, start_y, end_x - start_x, end_y - start_y
+
+
+class RegionMonitor:
+    """Re-samples pinned screen regions, computing statistics only for those whose pixels changed"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        # checksum of the pixels last sampled, by region bounds
+        self.checksums = {}
+        self.next_index = 0
+
+    def tick(self, fb, regions, data_format, budget):
+        """Re-samples regions, given as (x, y, width, height), until budget seconds have passed.
+
+        Each tick starts after the region the last one stopped at, and samples at least one region,
+        so every region is visited however small the budget. Returns {index: results} of the
+        regions whose pixels changed.
+        """
+        start = time.perf_counter()
+        viewport = tuple(fb.viewport_get())
+        updated = {}
+
+        for offset in range(len(regions)):
+            if offset and time.perf_counter() - start > budget:
+                break
+            index = (self.next_index + offset) % len(regions)
+            self.next_index = (index + 1) % len(regions)
+
+            x, y, width, height = clamp_bounds(regions[index], viewport)
+            pixels = read_rgb(fb, x, y, width, height, data_format)
+            checksum = fingerprint(pixels.reshape((height, width, 3)))
+            if self.checksums.get(regions[index]) == checksum:
+                continue
+
+            self.checksums[regions[index]] = checksum
+            with profiler.phase('stats'):
+                updated[index] = compute_stats(pixels)
+
+        for bounds in set(self.checksums).difference(regions):
+            del self.checksums[bounds]
+        return updated
+
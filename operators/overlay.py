@@ -0,0 +1,131 @@
+import logging
+import math
+
+from .draw_config import UNIFORM_COLOR, UNIFORM_LINE_COLOR
+
+log = logging.getLogger(__name__)
+
+SWATCH_SIZE = 50
+
+# pixels between the sampled tile and the swatch, so tiles read around the cursor do not capture it
+SWATCH_GAP = 5
+
+# segments of the unit circle outlining round kernels
+CIRCLE_SEGMENTS = 48
+
+_shaders = {}
+
+
+def get_shader(name):
+    """Builtin shader, created on first use instead of at import, or None if the GPU is unavailable"""
+    if name not in _shaders:
+        import gpu
+        try:
+            _shaders[name] = gpu.shader.from_builtin(name)
+        except SystemError:
+            log.warning('Failed to initialize gpu shader, draw will not work as expected')
+            _shaders[name] = None
+    return _shaders[name]
+
+
+def swatch_center(sqrt_length):
+    """Center of the swatch relative to the cursor"""
+    offset = sqrt_length + SWATCH_GAP
+    return offset + SWATCH_SIZE / 2, -offset - SWATCH_SIZE / 2
+
+
+def swatch_geometry(sqrt_length):
+    """Swatch fill triangles and outline relative to the cursor, offset past the sampled tile"""
+    offset = sqrt_length + SWATCH_GAP
+    left, top = offset, -offset
+    right, bottom = left + SWATCH_SIZE, top - SWATCH_SIZE
+
+    fill = ((left, top), (right, top), (left, bottom), (right, bottom))
+    fill_indices = ((0, 1, 2), (2, 1, 3))
+    edges = (fill[0], fill[1],
+             fill[0], fill[2],
+             fill[2], fill[3],
+             fill[1], fill[3])
+    return fill, fill_indices, edges
+
+
+def unit_rect_edges():
+    """Outline of the unit square, scaled and moved into place with the model matrix"""
+    return ((0, 0), (0, 1),
+            (0, 1), (1, 1),
+            (1, 1), (1, 0),
+            (1, 0), (0, 0))
+
+
+def unit_circle_edges(segments=CIRCLE_SEGMENTS):
+    """Outline of the circle of radius 1 around the origin, scaled and moved into place with the model matrix"""
+    points = [(math.cos(2.0 * math.pi * i / segments), math.sin(2.0 * math.pi * i / segments))
+              for i in range(segments)]
+    edges = []
+    for i in range(segments):
+        edges.extend((points[i], points[(i + 1) % segments]))
+    return edges
+
+
+def unit_grid_edges(rows, cols):
+    """Inner lines splitting the unit square into rows x cols cells"""
+    edges = []
+    for row in range(1, rows):
+        edges.extend(((0, row / rows), (1, row / rows)))
+    for col in range(1, cols):
+        edges.extend(((col / cols, 0), (col / cols, 1)))
+    return edges
+
+
+class OverlayBatches:
+    """GPU batches for one operator session, rebuilt only when their geometry key changes.
+
+    The batch factory defaults to gpu_extras.batch.batch_for_shader, imported on first use.
+    """
+
+    def __init__(self, batch_factory=None):
+        self.batch_factory = batch_factory
+        self._batches = {}
+
+    def get(self, name, key, build):
+        """Batches returned by build(), which only runs when the key differs from the cached one"""
+        cached = self._batches.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        batches = build()
+        self._batches[name] = (key, batches)
+        return batches
+
+    def batch(self, shader, primitive, positions, indices=None):
+        if self.batch_factory is None:
+            from gpu_extras.batch import batch_for_shader
+            self.batch_factory = batch_for_shader
+
+        if indices is None:
+            return self.batch_factory(shader, primitive, {'pos': positions})
+        return self.batch_factory(shader, primitive, {'pos': positions}, indices=indices)
+
+    def swatch(self, sqrt_length):
+        """Fill and edge batches of the picker swatch, drawn translated to the cursor"""
+        def build():
+            fill, fill_indices, edges = swatch_geometry(sqrt_length)
+            return (self.batch(get_shader(UNIFORM_COLOR), 'TRIS', fill, fill_indices),
+                    self.batch(get_shader(UNIFORM_LINE_COLOR), 'LINES', edges))
+
+        return self.get('swatch', sqrt_length, build)
+
+    def rect(self):
+        """Edge batch of the unit square, drawn scaled to the rectangle"""
+        return self.get('rect_edges', None,
+                        lambda: self.batch(get_shader(UNIFORM_LINE_COLOR), 'LINES', unit_rect_edges()))
+
+    def circle(self):
+        """Edge batch of the unit circle, drawn scaled to a round kernel"""
+        return self.get('circle_edges', None,
+                        lambda: self.batch(get_shader(UNIFORM_LINE_COLOR), 'LINES', unit_circle_edges()))
+
+    def grid(self, rows, cols):
+        """Edge batch of the cell lines inside the unit square, drawn scaled to the rectangle"""
+        return self.get('grid_edges', (rows, cols),
+                        lambda: self.batch(get_shader(UNIFORM_LINE_COLOR), 'LINES', unit_grid_edges(rows, cols)))
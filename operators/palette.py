@@ -0,0 +1,56 @@
+import numpy as np
+
+# pixels clustered for a palette, however large the selection
+SAMPLE_SIZE = 16384
+
+# channel variance below which a box is one color, far under an 8-bit step squared
+FLAT_VARIANCE = 1e-10
+
+
+def sample_step(pixel_count, sample_size=SAMPLE_SIZE):
+    """Grid spacing that keeps about sample_size pixels out of pixel_count"""
+    return max(1, int(np.sqrt(pixel_count / sample_size)))
+
+
+def stratified_sample(pixels, step, rng):
+    """One pixel per step x step cell of (height, width, 3) pixels, with a random grid offset"""
+    offset_y, offset_x = rng.integers(0, step, 2)
+    return pixels[offset_y::step, offset_x::step].reshape((-1, 3))
+
+
+def sample_tiles(tiles, step, rng=None):
+    """Stratified sample of every (height, width, 3) tile, as one (n, 3) array"""
+    rng = np.random.default_rng() if rng is None else rng
+    return np.concatenate([stratified_sample(tile, step, rng) for tile in tiles])
+
+
+def median_cut(samples, count):
+    """Splits (n, 3) samples into at most `count` boxes of similar colors.
+
+    Each split cuts the box with the largest squared error along its highest variance channel,
+    at that channel's mean so a dominant color is not cut in half. Boxes of one color, whose
+    variance is only rounding, and boxes the cut would leave on one side are kept whole.
+    Returns the mean color and share of samples of each box, most common first.
+    """
+    samples = np.asarray(samples, dtype=np.float32)
+    boxes = [samples] if len(samples) else []
+    whole = []
+
+    while boxes and len(boxes) + len(whole) < count:
+        errors = [np.var(box, axis=0) * len(box) for box in boxes]
+        widest = int(np.argmax([error.max() for error in errors]))
+        box = boxes.pop(widest)
+        channel = int(np.argmax(errors[widest]))
+
+        lower = box[:, channel] <= np.mean(box[:, channel])
+        if errors[widest][channel] <= FLAT_VARIANCE * len(box) or lower.all() or not lower.any():
+            whole.append(box)
+            continue
+        boxes.extend((box[lower], box[~lower]))
+
+    boxes += whole
+    colors = np.array([np.mean(box, axis=0) for box in boxes]).reshape((-1, 3))
+    coverage = np.array([len(box) for box in boxes]) / max(len(samples), 1)
+
+    order = np.argsort(-coverage, kind='stable')
+    return colors[order], coverage[order]
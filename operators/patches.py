@@ -0,0 +1,76 @@
+import numpy as np
+
+from .stats import STAT_NAMES, compute_stats, write_stats_csv
+
+# one record per patch, every statistic as an RGB triple
+PATCH_DTYPE = np.dtype([(name, np.float32, 3) for name in STAT_NAMES])
+
+
+def patch_columns(pixels, rows, cols, inset):
+    """Rearranges (height, width, 3) pixels of a chart into one column per patch channel.
+
+    The chart is split into rows x cols equal cells, centered in the pixels, and `inset` of each
+    cell's size is left out on every side to skip patch borders. The result is (n, rows * cols * 3)
+    with patches numbered row by row from the top left, like a color checker.
+    """
+    height, width = pixels.shape[:2]
+    cell_height, cell_width = height // rows, width // cols
+    if cell_height == 0 or cell_width == 0:
+        raise ValueError('Rectangle of {}x{} pixels is too small for {}x{} patches'.format(width, height, cols, rows))
+
+    inset_y = min(int(cell_height * inset), (cell_height - 1) // 2)
+    inset_x = min(int(cell_width * inset), (cell_width - 1) // 2)
+    offset_y = (height - rows * cell_height) // 2
+    offset_x = (width - cols * cell_width) // 2
+
+    grid = pixels[offset_y:offset_y + rows * cell_height, offset_x:offset_x + cols * cell_width]
+    cells = grid.reshape((rows, cell_height, cols, cell_width, 3))
+    # screen rows go bottom to top, chart rows top to bottom
+    cells = cells[::-1, inset_y:cell_height - inset_y, :, inset_x:cell_width - inset_x]
+    return cells.transpose((1, 3, 0, 2, 4)).reshape((-1, rows * cols * 3))
+
+
+def patch_stats(pixels, rows, cols, inset):
+    """Statistics of every patch in one pass, as a PATCH_DTYPE array of rows * cols records.
+
+    Every statistic is computed per column, so all patches go through compute_stats together.
+    """
+    results = compute_stats(patch_columns(pixels, rows, cols, inset))
+
+    patches = np.empty(rows * cols, dtype=PATCH_DTYPE)
+    for name in STAT_NAMES:
+        patches[name] = np.reshape(results[name], (rows * cols, 3))
+    return patches
+
+
+class PatchTable:
+    """Statistics of the last sampled chart, kept as one structured array"""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.patches = np.empty(0, dtype=PATCH_DTYPE)
+        self.rows = 0
+        self.cols = 0
+
+    def set(self, patches, rows, cols):
+        self.patches = patches
+        self.rows = rows
+        self.cols = cols
+
+    def __len__(self):
+        return len(self.patches)
+
+    def colors(self, index):
+        """Statistics of one patch keyed by window manager property, like compute_stats"""
+        return {name: self.patches[index][name] for name in STAT_NAMES}
+
+    def write_csv(self, filepath):
+        """Writes one line per patch with its position and every statistic channel"""
+        indices = np.arange(len(self.patches))
+        cols = max(self.cols, 1)
+        write_stats_csv(filepath, self.patches, (indices, indices // cols, indices % cols), ('patch', 'row', 'col'))
+
+
+patch_table = PatchTable()
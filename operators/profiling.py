@@ -0,0 +1,97 @@
+import json
+import time
+from array import array
+
+PHASES = ('readback', 'convert', 'stats', 'publish', 'propagate', 'draw')
+
+# timings kept per phase, older ones are overwritten
+RING_SIZE = 512
+
+
+class _NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_args):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _TimedPhase:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_args):
+        self.profiler.record(self.name, self.start, time.perf_counter() - self.start)
+        return False
+
+
+class PhaseProfiler:
+    """Opt-in timings of the picking hot path, kept in a fixed-size ring buffer per phase.
+
+    While disabled, phase() returns a shared no-op context manager, so instrumented code
+    only pays for one method call and one attribute check. Recording needs no NumPy,
+    which is only imported for the summary.
+    """
+
+    def __init__(self, size=RING_SIZE):
+        self.enabled = False
+        self.size = size
+        self.clear()
+
+    def clear(self):
+        self._starts = {name: array('d', bytes(8 * self.size)) for name in PHASES}
+        self._durations = {name: array('d', bytes(8 * self.size)) for name in PHASES}
+        self._counts = dict.fromkeys(PHASES, 0)
+
+    def phase(self, name):
+        if not self.enabled:
+            return _NULL_PHASE
+        return _TimedPhase(self, name)
+
+    def record(self, name, start, duration):
+        slot = self._counts[name] % self.size
+        self._starts[name][slot] = start
+        self._durations[name][slot] = duration
+        self._counts[name] += 1
+
+    def summary(self):
+        """Rolling mean and p95 in milliseconds and total count of each phase that ran"""
+        if not any(self._counts.values()):
+            return {}
+        import numpy as np
+
+        results = {}
+        for name in PHASES:
+            count = self._counts[name]
+            if count == 0:
+                continue
+            durations = np.frombuffer(self._durations[name])[:min(count, self.size)] * 1000.0
+            results[name] = (float(np.mean(durations)), float(np.percentile(durations, 95)), count)
+        return results
+
+    def dump_trace(self, filepath):
+        """Writes the buffered timings as a Chrome trace (chrome://tracing, Perfetto)"""
+        events = []
+        for tid, name in enumerate(PHASES):
+            kept = min(self._counts[name], self.size)
+            for start, duration in zip(self._starts[name][:kept], self._durations[name][:kept]):
+                events.append({'name': name, 'ph': 'X', 'pid': 0, 'tid': tid,
+                               'ts': start * 1e6, 'dur': duration * 1e6})
+        events.sort(key=lambda event: event['ts'])
+
+        with open(filepath, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return len(events)
+
+
+profiler = PhaseProfiler()
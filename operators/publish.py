@@ -0,0 +1,72 @@
+from contextlib import contextmanager
+
+from .copy_color import target_propagator
+from .profiling import profiler
+from .stat_names import STAT_NAMES
+
+# channel differences below this are not published again, well under one 8-bit step
+EPSILON = 1e-5
+
+_batch_depth = 0
+
+
+def is_publishing():
+    """True while a batch is being written, so property updates can leave propagation to it"""
+    return _batch_depth > 0
+
+
+@contextmanager
+def _batch():
+    global _batch_depth
+    _batch_depth += 1
+    try:
+        yield
+    finally:
+        _batch_depth -= 1
+
+
+def changed_values(window_manager, results, epsilon=EPSILON):
+    """Results that differ from the window manager's current values by more than epsilon in any channel,
+    as (attr, value) pairs in STAT_NAMES order"""
+    changed = []
+    for attr in STAT_NAMES:
+        if attr not in results:
+            continue
+        value = tuple(float(channel) for channel in results[attr])
+        current = getattr(window_manager, attr)
+        if any(abs(new - old) > epsilon for new, old in zip(value, current)):
+            changed.append((attr, value))
+    return changed
+
+
+def publish(window_manager, results, areas=(), commit=False, scene_linear=False):
+    """Writes picker statistics to the window manager as one batch, returning whether any changed.
+
+    Statistics within EPSILON of the current values are skipped. The changed ones are written
+    together, each area is tagged for redraw once and the bound targets are propagated once:
+    debounced while a picker is live, or immediately and unconditionally on commit.
+    scene_linear records whether the values are scene-linear rather than display-referred.
+    """
+    changed = changed_values(window_manager, results)
+    if window_manager.picker_scene_linear != scene_linear:
+        changed.append(('picker_scene_linear', scene_linear))
+    if changed:
+        with profiler.phase('publish'), _batch():
+            for attr, value in changed:
+                setattr(window_manager, attr, value)
+
+        tagged = []
+        for area in areas:
+            if area in tagged:
+                continue
+            tagged.append(area)
+            try:
+                area.tag_redraw()
+            except ReferenceError:
+                pass
+
+    if commit:
+        target_propagator.flush(window_manager)
+    elif changed and window_manager.picker_bindings:
+        target_propagator.request(window_manager)
+    return bool(changed)
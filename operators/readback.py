@@ -0,0 +1,129 @@
+import math
+import time
+
+import numpy as np
+
+from .profiling import profiler
+from .scheduler import content_generation
+
+DATA_TYPES = {'FLOAT': np.float32, 'UBYTE': np.uint8}
+
+# seconds a padded read is reused at most, since renders update the screen without marking content changed
+READ_REUSE_SECONDS = 0.1
+
+
+def choose_format(policy, context):
+    """Readback data format for a picker_readback policy.
+
+    AUTO reads bytes, which hold every value an 8-bit display shows exactly in a quarter of the memory,
+    and floats when the scene's view shows HDR values above 1, which a byte read would clip.
+    """
+    if policy != 'AUTO':
+        return policy
+    view_settings = getattr(getattr(context, 'scene', None), 'view_settings', None)
+    return 'FLOAT' if getattr(view_settings, 'use_hdr_view', False) else 'UBYTE'
+
+
+def buffer_to_array(buffer, width, height, channels=4, data_format='FLOAT'):
+    """Views a gpu.types.Buffer as a (width * height, channels) array without copying it"""
+    try:
+        pixels = np.asarray(buffer)
+    except (TypeError, ValueError, BufferError):
+        # older Buffer types without the buffer protocol
+        pixels = np.array(buffer.to_list(), dtype=DATA_TYPES[data_format])
+
+    return pixels.reshape((width * height, channels))
+
+
+def rgb_view(pixels):
+    """Strided view of the RGB channels, alpha is skipped rather than deleted"""
+    return pixels[:, :3]
+
+
+def read_rgb(fb, x, y, width, height, data_format='FLOAT'):
+    """Reads a rectangle of the framebuffer and returns its RGB pixels, one row per pixel.
+
+    UBYTE reads return uint8 pixels, which the statistics take as they are.
+    All four channels are read either way, the layout of the framebuffer that needs no repacking.
+    """
+    with profiler.phase('readback'):
+        screen_buffer = fb.read_color(x, y, width, height, 4, 0, data_format)
+    with profiler.phase('convert'):
+        return rgb_view(buffer_to_array(screen_buffer, width, height, data_format=data_format))
+
+
+def tile_bounds(x, y, width, height, tile_size):
+    """(x, y, width, height) of the tiles of at most tile_size x tile_size pixels covering a rectangle, row by row"""
+    for tile_y in range(y, y + height, tile_size):
+        tile_height = min(tile_size, y + height - tile_y)
+        for tile_x in range(x, x + width, tile_size):
+            yield tile_x, tile_y, min(tile_size, x + width - tile_x), tile_height
+
+
+def iter_tiles(fb, x, y, width, height, tile_size, data_format='FLOAT'):
+    """Reads a rectangle of the framebuffer in (height, width, 3) tiles of at most tile_size x tile_size pixels"""
+    for tile_x, tile_y, tile_width, tile_height in tile_bounds(x, y, width, height, tile_size):
+        tile = read_rgb(fb, tile_x, tile_y, tile_width, tile_height, data_format)
+        yield tile.reshape((tile_height, tile_width, 3))
+
+
+def iter_snapshot_tiles(snapshot, x, y, width, height, tile_size):
+    """Slices a rectangle of a read_snapshot array in the same tiles as iter_tiles, as views"""
+    for tile_x, tile_y, tile_width, tile_height in tile_bounds(x, y, width, height, tile_size):
+        yield snapshot[tile_y:tile_y + tile_height, tile_x:tile_x + tile_width]
+
+
+class TileReader:
+    """Reads square tiles around the cursor as (size, size, 3) views.
+
+    With padding, each framebuffer read covers that many extra pixels on every side,
+    and later tiles that fit inside it are sliced from it instead of read again,
+    until the screen content changes or the read is older than max_age seconds.
+    """
+
+    def __init__(self, padding=0, data_format='FLOAT', max_age=READ_REUSE_SECONDS):
+        self.padding = padding
+        self.data_format = data_format
+        self.max_age = max_age
+        self.viewport = None
+        self.origin = (0, 0)
+        self.pixels = None
+        self.generation = None
+        self.read_time = -math.inf
+
+    def invalidate(self):
+        self.pixels = None
+
+    def read(self, fb, x, y, size):
+        viewport = tuple(fb.viewport_get())
+        now = time.perf_counter()
+        if content_generation() != self.generation or now - self.read_time > self.max_age:
+            self.invalidate()
+
+        if self.pixels is not None and viewport == self.viewport:
+            origin_x, origin_y = self.origin
+            height, width = self.pixels.shape[:2]
+            if (origin_x <= x and origin_y <= y
+                    and x + size <= origin_x + width and y + size <= origin_y + height):
+                return self.pixels[y - origin_y:y - origin_y + size, x - origin_x:x - origin_x + size]
+
+        min_x, min_y, max_x, max_y = viewport
+        read_x, read_y = max(x - self.padding, min_x), max(y - self.padding, min_y)
+        width = max(min(x + size + self.padding, max_x) - read_x, size)
+        height = max(min(y + size + self.padding, max_y) - read_y, size)
+
+        self.viewport = viewport
+        self.origin = (read_x, read_y)
+        self.generation = content_generation()
+        self.read_time = now
+        self.pixels = read_rgb(fb, read_x, read_y, width, height, self.data_format).reshape((height, width, 3))
+
+        return self.pixels[y - read_y:y - read_y + size, x - read_x:x - read_x + size]
+
+
+def read_snapshot(fb, data_format='FLOAT'):
+    """Reads the framebuffer's whole viewport as a (height, width, 3) copy, uint8 for UBYTE reads, float32 otherwise"""
+    min_x, min_y, max_x, max_y = fb.viewport_get()
+    width, height = max_x - min_x, max_y - min_y
+    pixels = read_rgb(fb, min_x, min_y, width, height, data_format)
+    return np.ascontiguousarray(pixels).reshape((height, width, 3))
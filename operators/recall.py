@@ -0,0 +1,113 @@
+import logging
+import os
+
+import bpy
+
+from .lazy import loaded
+from .publish import publish
+
+log = logging.getLogger(__name__)
+
+
+def history_path():
+    """Sidecar file of the pick history beside the open blend file, or None if it was never saved"""
+    if not bpy.data.filepath:
+        return None
+    return os.path.splitext(bpy.data.filepath)[0] + '_picks.npy'
+
+
+def recorded_picks():
+    """Number of picks in the history, without importing the history helpers"""
+    history = loaded('history')
+    return 0 if history is None else len(history.pick_history)
+
+
+def sync_history_file(window_manager):
+    """Keeps the pick history in the sidecar file of the open blend file if enabled, or in memory"""
+    filepath = history_path() if window_manager.picker_history_file else None
+    history = loaded('history')
+    if filepath == (None if history is None else history.pick_history.filepath):
+        return
+
+    if history is not None:
+        history.pick_history.detach()
+    if filepath is None:
+        return
+
+    from .history import pick_history
+    try:
+        pick_history.attach(filepath)
+    except (OSError, ValueError) as e:
+        log.warning('Color Picker Pro keeps the pick history in memory: {}'.format(e))
+
+
+class RecallPickOperator(bpy.types.Operator):
+    bl_idname = 'wm.color_picker_pro_recall'
+    bl_label = 'Recall Pick'
+    bl_description = 'Copy the statistics of an earlier pick to the picker results, updating bound properties'
+
+    age: bpy.props.IntProperty(name='Picks Ago', description='0 recalls the latest pick', min=0,
+                               options={'SKIP_SAVE'})
+
+    @classmethod
+    def poll(cls, context):
+        return recorded_picks() > 0
+
+    def execute(self, context):
+        from .history import pick_history
+
+        try:
+            results, scene_linear = pick_history.recall(self.age)
+        except IndexError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+
+        publish(context.window_manager, results, commit=True, scene_linear=scene_linear)
+        return {'FINISHED'}
+
+
+class ExportHistoryOperator(bpy.types.Operator):
+    bl_idname = 'wm.color_picker_pro_export_history'
+    bl_label = 'Export History'
+    bl_description = 'Save every recorded pick as a CSV file, oldest first'
+
+    filepath: bpy.props.StringProperty(subtype='FILE_PATH', options={'SKIP_SAVE'})
+    filter_glob: bpy.props.StringProperty(default='*.csv', options={'HIDDEN'})
+
+    @classmethod
+    def poll(cls, context):
+        return recorded_picks() > 0
+
+    def invoke(self, context, event):
+        if not self.filepath:
+            self.filepath = 'color_picker_pro_picks.csv'
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        from .history import pick_history
+
+        try:
+            pick_history.write_csv(bpy.path.abspath(self.filepath))
+        except OSError as e:
+            self.report({'ERROR'}, 'Failed to save picks: {}'.format(e))
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, 'Saved {} picks to {}'.format(len(pick_history), self.filepath))
+        return {'FINISHED'}
+
+
+class ClearHistoryOperator(bpy.types.Operator):
+    bl_idname = 'wm.color_picker_pro_clear_history'
+    bl_label = 'Clear History'
+    bl_description = 'Forget every recorded pick'
+
+    @classmethod
+    def poll(cls, context):
+        return recorded_picks() > 0
+
+    def execute(self, context):
+        from .history import pick_history
+
+        pick_history.clear()
+        return {'FINISHED'}
@@ -0,0 +1,125 @@
+import math
+import time
+
+import bpy
+import gpu
+
+from .publish import publish
+
+
+class MonitorRegion(bpy.types.PropertyGroup):
+    x: bpy.props.IntProperty(name='X')
+    y: bpy.props.IntProperty(name='Y')
+    width: bpy.props.IntProperty(name='Width', min=1)
+    height: bpy.props.IntProperty(name='Height', min=1)
+
+    mean: bpy.props.FloatVectorProperty(
+        name='Mean',
+        description='The mean RGB values of the region when it last changed',
+        precision=4,
+        subtype='COLOR_GAMMA')
+
+    std: bpy.props.FloatVectorProperty(
+        name='Standard Deviation',
+        description='The standard deviation of the RGB values of the region when it last changed',
+        precision=4)
+
+
+class MonitorSession:
+    """Whether the region monitor runs, shared between its modal operator and the button that stops it"""
+
+    def __init__(self):
+        self.running = False
+        self.stop_requested = False
+
+    def reset(self):
+        self.running = False
+        self.stop_requested = False
+
+
+monitor_session = MonitorSession()
+
+
+class RegionMonitorOperator(bpy.types.Operator):
+    bl_idname = 'wm.color_picker_pro_monitor'
+    bl_label = 'Monitor Regions'
+    bl_description = ('Keep sampling the pinned regions while the screen changes, to watch a render converge. '
+                      'Run again to stop')
+
+    @classmethod
+    def poll(cls, context):
+        return monitor_session.running or len(context.window_manager.picker_monitor_regions) > 0
+
+    def invoke(self, context, event):
+        from .monitor import RegionMonitor
+        from .readback import choose_format
+
+        if monitor_session.running:
+            monitor_session.stop_requested = True
+            return {'FINISHED'}
+
+        wm = context.window_manager
+        self.monitor = RegionMonitor()
+        self.data_format = choose_format(wm.picker_readback, context)
+        self.last_tick = -math.inf
+        # the framebuffer can only be read with a window's context, which a modal has and app timers do not
+        self._timer = wm.event_timer_add(wm.picker_monitor_interval, window=context.window)
+
+        monitor_session.running = True
+        monitor_session.stop_requested = False
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        wm = context.window_manager
+        if monitor_session.stop_requested or not wm.picker_monitor_regions:
+            self.cancel(context)
+            return {'FINISHED'}
+
+        # timers of other operators arrive here as well
+        if event.type != 'TIMER' or time.perf_counter() - self.last_tick < 0.9 * wm.picker_monitor_interval:
+            return {'PASS_THROUGH'}
+
+        self.last_tick = time.perf_counter()
+        self.tick(wm)
+        return {'PASS_THROUGH'}
+
+    def tick(self, wm):
+        """Samples the pinned regions that changed within the budget, publishing the active one"""
+        regions = wm.picker_monitor_regions
+        bounds = [(region.x, region.y, region.width, region.height) for region in regions]
+
+        updated = self.monitor.tick(gpu.state.active_framebuffer_get(), bounds, self.data_format,
+                                    wm.picker_monitor_budget / 1000.0)
+        for index, results in updated.items():
+            regions[index].mean = tuple(results['picker_mean'])
+            regions[index].std = tuple(results['picker_std'])
+            if index == wm.picker_monitor_index:
+                publish(wm, results)
+
+    def cancel(self, context):
+        context.window_manager.event_timer_remove(self._timer)
+        monitor_session.reset()
+
+
+class UnpinRegionOperator(bpy.types.Operator):
+    bl_idname = 'wm.color_picker_pro_unpin'
+    bl_label = 'Unpin Region'
+    bl_description = 'Stop monitoring a pinned region'
+
+    # region to remove, -1 removes all of them
+    index: bpy.props.IntProperty(default=-1, options={'SKIP_SAVE'})
+
+    @classmethod
+    def poll(cls, context):
+        return len(context.window_manager.picker_monitor_regions) > 0
+
+    def execute(self, context):
+        regions = context.window_manager.picker_monitor_regions
+
+        if self.index < 0:
+            regions.clear()
+        elif self.index < len(regions):
+            regions.remove(self.index)
+
+        return {'FINISHED'}
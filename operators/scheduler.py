@@ -0,0 +1,78 @@
+import math
+import time
+
+# a tagged redraw that never arrives stops blocking samples after this many seconds
+FRAME_TIMEOUT = 0.1
+
+_content_generation = 0
+_content_changed_time = -math.inf
+
+
+def mark_content_changed():
+    """Called by handlers when the screen may show new content, making snapshots stale"""
+    global _content_generation, _content_changed_time
+    _content_generation += 1
+    _content_changed_time = time.perf_counter()
+
+
+def content_generation():
+    return _content_generation
+
+
+def content_unchanged_for():
+    """Seconds since the screen content last changed, to tell a settled screen from playback or rendering"""
+    return time.perf_counter() - _content_changed_time
+
+
+class SampleScheduler:
+    """Coalesces picker mouse moves into at most one sample per drawn frame and rate interval.
+
+    Positions that arrive too early are kept as pending, each newer one replacing the last,
+    and are sampled once the operator polls with take_pending.
+    """
+
+    def __init__(self, rate=0):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.last_sample = -math.inf
+        self.awaiting_frame = False
+        self.pending = None
+        self.last_key = None
+
+    def _ready(self, now):
+        elapsed = now - self.last_sample
+        if self.awaiting_frame and elapsed < FRAME_TIMEOUT:
+            return False
+        return elapsed >= self.interval
+
+    def submit(self, position, now=None):
+        """Records the latest position, returns True if it should be sampled right away"""
+        now = time.perf_counter() if now is None else now
+        if self._ready(now):
+            self.pending = None
+            self.last_sample = now
+            return True
+
+        self.pending = position
+        return False
+
+    def take_pending(self, now=None):
+        """Returns the newest pending position once it may be sampled, otherwise None"""
+        now = time.perf_counter() if now is None else now
+        if self.pending is None or not self._ready(now):
+            return None
+
+        position, self.pending = self.pending, None
+        self.last_sample = now
+        return position
+
+    def changed(self, key):
+        """Returns True if a sample differs from the previous one, and waits for its redraw if so"""
+        if key == self.last_key:
+            return False
+
+        self.last_key = key
+        self.awaiting_frame = True
+        return True
+
+    def frame_drawn(self):
+        self.awaiting_frame = False
@@ -14,46 +14,69 @@ Created by Spencer Magnusson
     along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
+
 import bpy
 import gpu
-from gpu_extras.batch import batch_for_shader
-import numpy as np
 
 from .draw_config import UNIFORM_COLOR, UNIFORM_LINE_COLOR, config_line_shader
+from .overlay import SWATCH_SIZE, OverlayBatches, get_shader, swatch_center
+from .profiling import profiler
+from .publish import publish
+from .scheduler import SampleScheduler, content_generation, content_unchanged_for
+from .stat_names import STAT_NAMES
+from .worker import cancel_current
+
+# seconds the screen must stay unchanged before a stale snapshot is rebuilt,
+# so playback and renders are sampled directly instead of rebuilding it on every frame
+SNAPSHOT_SETTLE_SECONDS = 0.5
+
+# radius of the kernel glyph in the swatch, as a share of the swatch size
+KERNEL_GLYPH_RADIUS = 0.35
+
 
-vertices = ((0, 0), (50, 0),
-            (0, -50), (50, -50))
-indices = ((0, 1, 2), (2, 1, 3), (0, 1, 1), (1, 2, 2), (2, 2, 3), (3, 0, 0))
+def draw_kernel_glyph(operator, shader):
+    """Marks a round kernel with a ring inside the swatch, a Gaussian one with a second ring at its sigma.
 
+    The glyph stays inside the swatch because the next tile is read from a frame that still shows
+    the overlay, and anything drawn around the sampled pixels ends up in it after a move.
+    Square kernels are not marked. Expects the model matrix at the cursor.
+    """
+    if operator.kernel_shape == 'SQUARE':
+        return
 
-try:
-    fill_shader = gpu.shader.from_builtin(UNIFORM_COLOR)
-    edge_shader = gpu.shader.from_builtin(UNIFORM_LINE_COLOR)
-except SystemError as e:
-    import logging
-    log = logging.getLogger(__name__)
-    log.warn('Failed to initialize gpu shader, draw will not work as expected')
+    from .kernels import GAUSSIAN_SIGMA
+
+    radius = SWATCH_SIZE * KERNEL_GLYPH_RADIUS
+    gpu.matrix.translate(swatch_center(operator.sqrt_length))
+    gpu.matrix.scale((radius, radius))
+    operator.overlay.circle().draw(shader)
+    if operator.kernel_shape == 'GAUSSIAN':
+        gpu.matrix.scale((GAUSSIAN_SIGMA, GAUSSIAN_SIGMA))
+        operator.overlay.circle().draw(shader)
 
 
 def draw(operator):
-    m_x, m_y = operator.x, operator.y
-    length = operator.sqrt_length + 5
-    curr_color = tuple(list(operator.curr_color) + [1.0])
-    fill_shader.uniform_float("color", curr_color)
+    operator.scheduler.frame_drawn()
+    if operator.overlay_hidden:
+        operator.overlay_cleared = True
+        return
+    if operator.x is None:
+        return
 
-    draw_verts = tuple((m_x + x + length, m_y + y - length) for x,y in vertices)
-    batch = batch_for_shader(fill_shader, 'TRIS', {"pos": draw_verts}, indices=indices)
-    batch.draw(fill_shader)
+    fill_shader, edge_shader = get_shader(UNIFORM_COLOR), get_shader(UNIFORM_LINE_COLOR)
+    if fill_shader is None or edge_shader is None:
+        return
 
-    config_line_shader(edge_shader, (1.0, 0.0, 0.0, 1.0))
+    with profiler.phase('draw'), gpu.matrix.push_pop():
+        config_line_shader(edge_shader, (1.0, 0.0, 0.0, 1.0))
+        fill_batch, edge_batch = operator.overlay.swatch(operator.sqrt_length)
+        gpu.matrix.translate((operator.x, operator.y))
 
-    edges = (draw_verts[0], draw_verts[1],
-             draw_verts[0], draw_verts[2],
-             draw_verts[2], draw_verts[3],
-             draw_verts[1], draw_verts[3])
+        fill_shader.uniform_float("color", tuple(operator.curr_color) + (1.0,))
+        fill_batch.draw(fill_shader)
 
-    edge_batch = batch_for_shader(edge_shader, 'LINES', {"pos": edges})
-    edge_batch.draw(edge_shader)
+        edge_batch.draw(edge_shader)
+        draw_kernel_glyph(operator, edge_shader)
 
 
 class ScreenPickerOperator(bpy.types.Operator):
@@ -69,57 +92,143 @@ class ScreenPickerOperator(bpy.types.Operator):
     # square root of number of pixels taken into account, 3 is a 3x3 square
     sqrt_length: bpy.props.IntProperty(default=3)
 
-    def modal(self, context, event):
-        context.area.tag_redraw()
-        wm = context.window_manager
+    # extra pixels read around the tile so small cursor moves reuse the same read,
+    # kept below the swatch offset so the overlay never lands in a reused read
+    reuse_padding: bpy.props.IntProperty(default=0, min=0, max=4, options={'SKIP_SAVE'})
+
+    def tile_stats(self, tile):
+        """Statistics of a (size, size, 3) tile, weighted by the kernel unless it is square"""
+        if self.kernel_shape == 'SQUARE':
+            from .stats import compute_stats
+            return compute_stats(tile.reshape((-1, 3)), extremes='BRIGHTNESS')
+
+        from .kernels import kernel_stats
+        return kernel_stats(tile, self.kernel_shape, extremes='BRIGHTNESS')
+
+    def sample_screen(self, mouse_x, mouse_y):
+        """Reads the tile around a window position, returns the tile, its statistics and the cursor pixel"""
+        sqrt_length = self.sqrt_length
+        distance = sqrt_length // 2
+
+        fb = gpu.state.active_framebuffer_get()
+        min_x, min_y, max_x, max_y = fb.viewport_get()
+
+        # clamping is required for Vulkan
+        region_x = min(max(mouse_x - distance, min_x), max_x - sqrt_length - 1)
+        region_y = min(max(mouse_y - distance, min_y), max_y - sqrt_length - 1)
+        if self.sliding is not None and content_generation() == self.snapshot_generation:
+            with profiler.phase('stats'):
+                self.sliding.move_to(region_x - min_x, region_y - min_y)
+                tile = self.sliding.window()
+                results = self.sliding.results() if self.kernel_shape == 'SQUARE' else self.tile_stats(tile)
+        else:
+            tile = self.tile_reader.read(fb, region_x, region_y, sqrt_length)
+            with profiler.phase('stats'):
+                results = self.tile_stats(tile)
+
+        # the cursor pixel comes from the same read, clamped into the tile at viewport edges
+        cursor_x = min(max(mouse_x - region_x, 0), sqrt_length - 1)
+        cursor_y = min(max(mouse_y - region_y, 0), sqrt_length - 1)
+        return tile, results, (cursor_x, cursor_y)
+
+    def sample_image(self, mouse_x, mouse_y):
+        """Slices the tile around a window position from the cached image pixels"""
+        from .image_cache import image_tile
 
-        if event.type in {'MOUSEMOVE', 'LEFTMOUSE'}:
-            sqrt_length = self.sqrt_length
-            distance = sqrt_length // 2
+        region = self.image_region
+        u, v = region.view2d.region_to_view(mouse_x - region.x, mouse_y - region.y)
+        height, width = self.image_pixels.shape[:2]
 
-            fb = gpu.state.active_framebuffer_get()
-            min_x, min_y, max_x, max_y = fb.viewport_get()
+        tile, cursor = image_tile(self.image_pixels, int(u * width), int(v * height), self.sqrt_length)
+        with profiler.phase('stats'):
+            results = self.tile_stats(tile)
+        return tile, results, cursor
 
-            mouse_x, mouse_y = event.mouse_x, event.mouse_y
+    def sample(self, context, position, commit=False):
+        """Samples the tile around a (mouse_x, mouse_y, region_x, region_y) position, returning its statistics.
 
-            self.x = event.mouse_region_x
-            self.y = event.mouse_region_y
+        The statistics are published to the window manager, and commit propagates them to the bound targets at once.
+        """
+        from .stats import to_float
 
-            # clamping is required for Vulkan
-            region_x = min(max(mouse_x - distance, min_x), max_x - sqrt_length - 1)
-            region_y = min(max(mouse_y - distance, min_y), max_y - sqrt_length - 1)
-            screen_buffer = fb.read_color(region_x, region_y, sqrt_length, sqrt_length, 4, 0, 'FLOAT')
-            channels = np.delete(np.array(screen_buffer.to_list()).reshape((sqrt_length * sqrt_length, 4)), 3, axis=1)
+        mouse_x, mouse_y, self.x, self.y = position
 
-            single_x = min(max(mouse_x, min_x), max_x - 1)
-            single_y = min(max(mouse_y, min_y), max_y - 1)
-            curr_picker_buffer = fb.read_color(single_x, single_y, 1, 1, 3, 0, 'FLOAT')
-            self.curr_color = np.array(curr_picker_buffer.to_list()).reshape(-1)
+        if self.image_pixels is not None:
+            tile, results, (cursor_x, cursor_y) = self.sample_image(mouse_x, mouse_y)
+        else:
+            tile, results, (cursor_x, cursor_y) = self.sample_screen(mouse_x, mouse_y)
+        self.curr_color = to_float(tile[cursor_y, cursor_x])
 
-            dot = np.sum(channels, axis=1)
-            max_ind = np.argmax(dot, axis=0)
-            min_ind = np.argmin(dot, axis=0)
+        publish(context.window_manager, results, commit=commit, scene_linear=self.scene_linear)
 
-            wm.picker_mean = tuple(np.mean(channels, axis=0))
-            wm.picker_max = tuple(channels[max_ind])
-            wm.picker_min = tuple(channels[min_ind])
-            wm.picker_median = tuple(np.median(channels, axis=0))
+        # the swatch follows the cursor even when the statistics stay the same
+        key = (self.x, self.y, tuple(self.curr_color)) + tuple(tuple(value) for value in results.values())
+        if self.scheduler.changed(key):
+            context.area.tag_redraw()
+        return results
 
-        if event.type == 'LEFTMOUSE':
+    def build_snapshot(self):
+        """Reads the screen once, hovering then queries the snapshot instead of the GPU"""
+        from .readback import read_snapshot
+        from .snapshot_index import SnapshotIndex
+        from .stats import SlidingWindowStats
+
+        index = SnapshotIndex(read_snapshot(gpu.state.active_framebuffer_get(), self.data_format))
+        self.sliding = SlidingWindowStats(index, self.sqrt_length)
+        self.snapshot_generation = content_generation()
+
+    def refresh_snapshot(self, context):
+        """Rebuilds a stale snapshot once the screen settles, after a redraw without the overlay so it is not captured.
+
+        Until then, samples read the screen directly.
+        """
+        if self.sliding is None or content_generation() == self.snapshot_generation:
+            return
+        if content_unchanged_for() < SNAPSHOT_SETTLE_SECONDS:
+            return
+
+        if not self.overlay_hidden:
+            self.overlay_hidden = True
+            context.area.tag_redraw()
+        elif self.overlay_cleared:
+            self.build_snapshot()
+            self.overlay_hidden = self.overlay_cleared = False
+            context.area.tag_redraw()
+
+    def modal(self, context, event):
+        wm = context.window_manager
+        self.refresh_snapshot(context)
+        position = (event.mouse_x, event.mouse_y, event.mouse_region_x, event.mouse_region_y)
+
+        if event.type == 'MOUSEMOVE':
+            if self.scheduler.submit(position):
+                self.sample(context, position)
+
+        elif event.type == 'TIMER':
+            pending = self.scheduler.take_pending()
+            if pending is not None:
+                self.sample(context, pending)
+
+        elif event.type == 'LEFTMOUSE':
+            from .history import pick_history
+
+            # always commit the exact click position, never a coalesced one
+            results = self.sample(context, position, commit=True)
+            pick_history.append(results, event.mouse_x, event.mouse_y, self.sqrt_length, self.sqrt_length,
+                                self.scene_linear)
             self.cancel(context)
             return {'FINISHED'}
 
         elif event.type in {'RIGHTMOUSE', 'ESC'}:
-            wm.picker_mean = self.prev_mean
-            wm.picker_median = self.prev_median
-            wm.picker_max = self.prev_max
-            wm.picker_min = self.prev_min
+            publish(wm, self.prev, commit=True, scene_linear=self.prev_scene_linear)
             self.cancel(context)
             return {'CANCELLED'}
 
         return {'RUNNING_MODAL'}
 
     def cancel(self, context):
+        context.window_manager.event_timer_remove(self._timer)
+        context.area.tag_redraw()
         context.area.header_text_set(None)
         context.window.cursor_modal_restore()
         space = getattr(bpy.types, self.space_type)
@@ -127,11 +236,37 @@ class ScreenPickerOperator(bpy.types.Operator):
         return {'CANCELLED'}
 
     def invoke(self, context, event):
+        # NumPy and the sampling helpers load on the first pick, not when Blender starts
+        from .image_cache import image_cache
+        from .readback import TileReader, choose_format
+
         wm = context.window_manager
-        self.prev_mean = (wm.picker_mean[0], wm.picker_mean[1], wm.picker_mean[2])
-        self.prev_median = (wm.picker_median[0], wm.picker_median[1], wm.picker_median[2])
-        self.prev_max = (wm.picker_max[0], wm.picker_max[1], wm.picker_max[2])
-        self.prev_min = (wm.picker_min[0], wm.picker_min[1], wm.picker_min[2])
+        cancel_current()
+        self.prev = {attr: tuple(getattr(wm, attr)) for attr in STAT_NAMES}
+        self.prev_scene_linear = wm.picker_scene_linear
+        self.data_format = choose_format(wm.picker_readback, context)
+        self.kernel_shape = wm.picker_kernel
+        self.tile_reader = TileReader(padding=self.reuse_padding, data_format=self.data_format)
+        self.sliding = None
+        self.overlay_hidden = False
+        self.overlay_cleared = False
+        if wm.picker_use_snapshot:
+            self.build_snapshot()
+        self.image_pixels = None
+        self.scene_linear = False
+        space_data = context.space_data
+        if wm.picker_sample_image and space_data.type == 'IMAGE_EDITOR' and space_data.image is not None:
+            # painting tags the image in the depsgraph, whose handler drops its cached pixels
+            self.image_pixels = image_cache.get(space_data.image)
+            # float buffers hold scene-linear values, byte buffers the encoded ones of the image's color space
+            self.scene_linear = space_data.image.is_float
+            self.image_region = next(r for r in context.area.regions if r.type == 'WINDOW')
+        self.scheduler = SampleScheduler(wm.picker_sample_rate)
+        self.overlay = OverlayBatches()
+        self.x = None
+
+        # polls coalesced mouse moves, at the rate cap or at most 120 times per second
+        self._timer = wm.event_timer_add(self.scheduler.interval or 1 / 120, window=context.window)
         context.window_manager.modal_handler_add(self)
         context.window.cursor_modal_set('EYEDROPPER')
         context.area.header_text_set('Left click mouse to pick colors, '
@@ -17,20 +17,57 @@ Created by Spencer Magnusson
 
 import bpy
 import gpu
-from gpu_extras.batch import batch_for_shader
-import numpy as np
+import math
 import time
 
-from .draw_config import UNIFORM_LINE_COLOR, IS_AFTER_4_5, config_line_shader
+from .draw_config import UNIFORM_LINE_COLOR, config_line_shader
+from .overlay import OverlayBatches, get_shader
+from .profiling import profiler
+from .publish import publish
+from .scheduler import content_generation
+from .worker import cancel_current, start_job, start_tiled_job
+
+# rectangles larger than one tile are read in tiles of this size and accumulated tile by tile
+TILE_SIZE = 1024
+
+# rectangles larger than this have their statistics computed off the main thread
+BACKGROUND_PIXELS = 256 * 256
+
+
+def deliver_results(job, area, bounds):
+    """Polls a statistics job from a timer, showing progress in the header and publishing its results.
+
+    bounds are the (x, y, width, height) of the rectangle, recorded in the pick history.
+    """
+    def poll():
+        if job.cancelled:
+            try:
+                area.header_text_set(None)
+            except ReferenceError:
+                pass
+            return None
+
+        # tiled jobs read their next tiles here, on the main thread, as the worker takes them
+        feeding = job.feed()
+        try:
+            if not job.done():
+                area.header_text_set('Computing colors... {:.0%}'.format(job.progress))
+                return 0.01 if feeding else 0.05
+            area.header_text_set(None)
+        except ReferenceError:
+            pass
+
+        results = job.results()
+        if results is not None:
+            from .history import pick_history
+
+            pick_history.append(results, *bounds)
+            publish(bpy.context.window_manager, results, areas=(area,), commit=True)
+
+        return None
+
+    bpy.app.timers.register(poll, first_interval=0.05)
 
-indices = ((0, 1, 2), (2, 1, 3))
-try:
-    shader = gpu.shader.from_builtin(UNIFORM_LINE_COLOR)
-    
-except SystemError as e:
-    import logging
-    log = logging.getLogger(__name__)
-    log.warn('Failed to initialize gpu shader, draw will not work as expected')
 
 def draw(operator):
     start_x, end_x = sorted([operator.draw_start_x, operator.draw_end_x])
@@ -39,14 +76,18 @@ def draw(operator):
     if start_x == -1:
         return
 
-    draw_verts = ((start_x, start_y), (start_x, end_y),
-                  (start_x, end_y), (end_x, end_y),
-                  (end_x, end_y), (end_x, start_y),
-                  (end_x, start_y), (start_x, start_y))
+    shader = get_shader(UNIFORM_LINE_COLOR)
+    if shader is None:
+        return
+
+    with profiler.phase('draw'), gpu.matrix.push_pop():
+        gpu.matrix.translate((start_x, start_y))
+        gpu.matrix.scale((end_x - start_x, end_y - start_y))
 
-    config_line_shader(shader, (1.0, 1.0, 1.0, 1.0))
-    batch = batch_for_shader(shader, 'LINES', {"pos": draw_verts})
-    batch.draw(shader)
+        config_line_shader(shader, (1.0, 1.0, 1.0, 1.0))
+        operator.overlay.rect().draw(shader)
+        if operator.is_grid():
+            operator.overlay.grid(operator.grid_rows, operator.grid_cols).draw(shader)
 
 
 class ScreenRectOperator(bpy.types.Operator):
@@ -55,6 +96,43 @@ class ScreenRectOperator(bpy.types.Operator):
     bl_description = 'Select a rectangle of the screen and extract its color information'
     bl_options = {'REGISTER', 'UNDO'}
 
+    extract_palette: bpy.props.BoolProperty(
+        name='Extract Palette',
+        description='Write the dominant colors of the rectangle to a palette instead of its statistics',
+        default=False,
+        options={'SKIP_SAVE'})
+
+    pin_region: bpy.props.BoolProperty(
+        name='Pin Region',
+        description='Add the rectangle to the regions the monitor keeps sampling instead of sampling it once',
+        default=False,
+        options={'SKIP_SAVE'})
+
+    palette_size: bpy.props.IntProperty(name='Colors', default=8, min=1, max=32)
+
+    palette_name: bpy.props.StringProperty(name='Palette', default='Color Picker Pro')
+
+    grid_rows: bpy.props.IntProperty(
+        name='Rows',
+        description='Rows of patches in the rectangle, each sampled separately',
+        default=1, min=1, max=64,
+        options={'SKIP_SAVE'})
+
+    grid_cols: bpy.props.IntProperty(
+        name='Columns',
+        description='Columns of patches in the rectangle, each sampled separately',
+        default=1, min=1, max=64,
+        options={'SKIP_SAVE'})
+
+    grid_inset: bpy.props.FloatProperty(
+        name='Inset',
+        description='Share of each patch left out on every side, to skip the borders between patches',
+        default=0.2, min=0.0, max=0.45,
+        subtype='FACTOR')
+
+    def is_grid(self):
+        return self.grid_rows * self.grid_cols > 1
+
     def modal(self, context, event):
         self.draw_end_x, self.draw_end_y = event.mouse_region_x, event.mouse_region_y
 
@@ -72,6 +150,9 @@ class ScreenRectOperator(bpy.types.Operator):
             self.end_x, self.end_y = event.mouse_x, event.mouse_y
             self.finished = time.time()
         elif self.finished is not None and (time.time() - self.finished) > 0.2:
+            from .history import pick_history
+            from .stats import compute_stats
+
             fb = gpu.state.active_framebuffer_get()
             min_x, min_y, max_x, max_y = fb.viewport_get()
 
@@ -87,17 +168,34 @@ class ScreenRectOperator(bpy.types.Operator):
             x_len = (end_x - start_x) + 1
             y_len = (end_y - start_y) + 1
 
-            screen_buffer = fb.read_color(start_x, start_y, x_len, y_len, 4, 0, 'FLOAT')
+            if self.pin_region:
+                self.write_region(context, start_x, start_y, x_len, y_len)
+                return {'FINISHED'}
+
+            if self.extract_palette:
+                self.write_palette(context, self.region_tiles(fb, start_x, start_y, x_len, y_len), x_len * y_len)
+                return {'FINISHED'}
 
-            channels = np.delete(np.array(screen_buffer.to_list()).reshape((x_len * y_len, 4)), 3, axis=1)
+            if self.is_grid():
+                self.write_patches(context, self.region_pixels(fb, start_x, start_y, x_len, y_len))
+                return {'FINISHED'}
 
-            wm = context.window_manager
+            if x_len * y_len > BACKGROUND_PIXELS:
+                # the readback must stay on the main thread, only the reductions move to the worker
+                if x_len * y_len > TILE_SIZE * TILE_SIZE:
+                    count = math.ceil(x_len / TILE_SIZE) * math.ceil(y_len / TILE_SIZE)
+                    job = start_tiled_job(self.region_tiles(fb, start_x, start_y, x_len, y_len), count)
+                else:
+                    job = start_job(self.region_pixels(fb, start_x, start_y, x_len, y_len).reshape((-1, 3)))
+                deliver_results(job, context.area, (start_x, start_y, x_len, y_len))
+                return {'FINISHED'}
+            else:
+                channels = self.region_pixels(fb, start_x, start_y, x_len, y_len).reshape((-1, 3))
+                with profiler.phase('stats'):
+                    results = compute_stats(channels)
 
-            wm.picker_mean = tuple(np.mean(channels, axis=0))
-            wm.picker_max = tuple(np.max(channels, axis=0))
-            wm.picker_min = tuple(np.min(channels, axis=0))
-            wm.picker_median = tuple(np.median(channels, axis=0))
-            context.area.tag_redraw()
+            pick_history.append(results, start_x, start_y, x_len, y_len)
+            publish(context.window_manager, results, areas=(context.area,), commit=True)
             return {'FINISHED'}
         elif event.type == 'ESC':
             self.cleanup()
@@ -105,6 +203,67 @@ class ScreenRectOperator(bpy.types.Operator):
 
         return {'RUNNING_MODAL'}
 
+    def region_tiles(self, fb, x, y, width, height, tile_size=TILE_SIZE):
+        """(height, width, 3) tiles of a rectangle, sliced from the snapshot unless the screen changed since"""
+        from .readback import iter_snapshot_tiles, iter_tiles
+
+        if self.snapshot is not None and content_generation() == self.snapshot_generation:
+            min_x, min_y = fb.viewport_get()[:2]
+            return iter_snapshot_tiles(self.snapshot, x - min_x, y - min_y, width, height, tile_size)
+        return iter_tiles(fb, x, y, width, height, tile_size, self.data_format)
+
+    def region_pixels(self, fb, x, y, width, height):
+        """(height, width, 3) pixels of a rectangle, in one tile"""
+        return next(self.region_tiles(fb, x, y, width, height, max(width, height)))
+
+    def write_palette(self, context, tiles, pixel_count):
+        """Clusters a stratified sample of the rectangle's tiles into the named palette"""
+        from .palette import median_cut, sample_step, sample_tiles
+        from .stats import to_float
+
+        with profiler.phase('stats'):
+            samples = to_float(sample_tiles(tiles, sample_step(pixel_count)))
+            colors, coverage = median_cut(samples, self.palette_size)
+
+        palette = bpy.data.palettes.get(self.palette_name)
+        if palette is None:
+            palette = bpy.data.palettes.new(self.palette_name)
+
+        palette.colors.clear()
+        for _ in range(len(colors)):
+            palette.colors.new()
+        palette.colors.foreach_set('color', colors.astype('float32').reshape(-1))
+        palette.colors.active = palette.colors[0]
+        # share of the selection each color covers, in palette order
+        palette['coverage'] = [float(c) for c in coverage]
+
+        self.report({'INFO'}, 'Palette "{}": {}'.format(
+            palette.name, ', '.join('{:.0%}'.format(c) for c in coverage)))
+        context.area.tag_redraw()
+
+    def write_patches(self, context, pixels):
+        """Samples every patch of the grid from one read of the rectangle into the patch table"""
+        from .patches import patch_stats, patch_table
+
+        try:
+            with profiler.phase('stats'):
+                patches = patch_stats(pixels, self.grid_rows, self.grid_cols, self.grid_inset)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return
+
+        patch_table.set(patches, self.grid_rows, self.grid_cols)
+        self.report({'INFO'}, 'Sampled {} patches'.format(len(patches)))
+        context.area.tag_redraw()
+
+    def write_region(self, context, x, y, width, height):
+        """Pins the rectangle for the region monitor to keep sampling"""
+        wm = context.window_manager
+        region = wm.picker_monitor_regions.add()
+        region.x, region.y, region.width, region.height = x, y, width, height
+        self.report({'INFO'}, 'Pinned region {} of {}x{} pixels'.format(len(wm.picker_monitor_regions) - 1,
+                                                                       width, height))
+
     def cleanup(self):
         if self._handler is not None:
             space = getattr(bpy.types, self.space_type)
@@ -115,16 +274,30 @@ class ScreenRectOperator(bpy.types.Operator):
         bpy.context.window.cursor_modal_restore()
 
     def invoke(self, context, event):
+        from .readback import choose_format
+
+        # a newer pick supersedes any statistics still being computed
+        cancel_current()
         self.start_x, self.start_y = -1, -1
 
         self.draw_start_x, self.draw_start_y = -1, -1
         self.draw_end_x, self.draw_end_y = -1, -1
 
+        self.overlay = OverlayBatches()
         self.space_type = context.space_data.__class__.__name__
         space = getattr(bpy.types, self.space_type)
         self._handler = space.draw_handler_add(draw, (self,), 'WINDOW', 'POST_PIXEL')
 
         self.finished = None
+        self.data_format = choose_format(context.window_manager.picker_readback, context)
+
+        self.snapshot = None
+        if context.window_manager.picker_use_snapshot:
+            from .readback import read_snapshot
+
+            # captured before the outline is drawn, used unless the screen changes during the pick
+            self.snapshot = read_snapshot(gpu.state.active_framebuffer_get(), self.data_format)
+            self.snapshot_generation = content_generation()
 
         context.area.header_text_set('Left click to set first corner of rectangle, '
                                      'right click to set opposite corner, '
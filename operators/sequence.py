@@ -0,0 +1,124 @@
+import json
+import os
+import re
+from collections import deque
+
+import numpy as np
+
+from .stats import STAT_NAMES, compute_stats, write_stats_csv
+
+# one record per frame, frames that failed to load are NaN
+FRAME_DTYPE = np.dtype([('frame', np.int32)] + [(name, np.float32, 3) for name in STAT_NAMES])
+
+# frames whose statistics are computed or waiting at once, bounding the memory of long sequences
+MAX_IN_FLIGHT = 4
+
+# Rec. 709 luma weights, for the brightness of a frame
+LUMA_WEIGHTS = np.array((0.2126, 0.7152, 0.0722))
+
+_LAST_DIGITS = re.compile(r'(\d+)(?=\D*$)')
+
+
+def frame_number(filepath):
+    """Frame number of a file in an image sequence, the last run of digits in its name"""
+    match = _LAST_DIGITS.search(os.path.basename(filepath))
+    if match is None:
+        raise ValueError('"{}" is not part of a numbered image sequence'.format(filepath))
+    return int(match.group(1))
+
+
+def frame_path(filepath, number):
+    """Path of another frame in the same image sequence, keeping the zero padding"""
+    directory, name = os.path.split(filepath)
+    match = _LAST_DIGITS.search(name)
+    if match is None:
+        raise ValueError('"{}" is not part of a numbered image sequence'.format(filepath))
+    digits = str(number).zfill(len(match.group(1)))
+    return os.path.join(directory, name[:match.start()] + digits + name[match.end():])
+
+
+def crop_region(pixels, x, y, width, height):
+    """Copy of the RGB pixels of a region of (height, width, channels) frame pixels, clamped inside it.
+
+    Zero width or height extends the region to the edge of the frame.
+    """
+    frame_height, frame_width, channels = pixels.shape
+    x = min(max(x, 0), frame_width - 1)
+    y = min(max(y, 0), frame_height - 1)
+    width = frame_width - x if width <= 0 else min(width, frame_width - x)
+    height = frame_height - y if height <= 0 else min(height, frame_height - y)
+
+    region = pixels[y:y + height, x:x + width]
+    if channels >= 3:
+        return np.ascontiguousarray(region[:, :, :3])
+    return np.repeat(region[:, :, :1], 3, axis=2)
+
+
+def prefetched(items, function, executor, max_in_flight=MAX_IN_FLIGHT):
+    """Maps function over items on the executor, yielding results in order.
+
+    Items are only drawn from the iterator while fewer than max_in_flight results are pending,
+    so a lazy iterator is never read far ahead of the results being consumed.
+    """
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(function, item))
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def region_stats(item):
+    """Statistics record of one (frame, region) item, NaN when the region is None"""
+    frame, region = item
+    record = np.zeros((), dtype=FRAME_DTYPE)
+    record['frame'] = frame
+    results = {} if region is None else compute_stats(region.reshape((-1, 3)))
+    for name in STAT_NAMES:
+        record[name] = results.get(name, np.nan)
+    return record
+
+
+def frame_table(records):
+    return np.array(list(records), dtype=FRAME_DTYPE)
+
+
+def summarize(table):
+    """Consistency of the region across frames: spread of its mean, and the largest brightness jump"""
+    valid = table[~np.isnan(table['picker_mean'][:, 0])]
+    summary = {'frames': len(table), 'missing_frames': int(len(table) - len(valid))}
+    if len(valid) == 0:
+        return summary
+
+    means = valid['picker_mean'].astype(np.float64)
+    luma = means @ LUMA_WEIGHTS
+    summary.update({
+        'mean': means.mean(axis=0).tolist(),
+        'mean_std': means.std(axis=0).tolist(),
+        'luma_min': float(luma.min()),
+        'luma_max': float(luma.max()),
+        'luma_min_frame': int(valid['frame'][np.argmin(luma)]),
+        'luma_max_frame': int(valid['frame'][np.argmax(luma)]),
+    })
+    if len(valid) > 1:
+        jumps = np.abs(np.diff(luma))
+        summary['largest_luma_jump'] = float(jumps.max())
+        summary['largest_luma_jump_frame'] = int(valid['frame'][np.argmax(jumps) + 1])
+    return summary
+
+
+def write_table(table, filepath):
+    """Writes the per-frame table as NPY or CSV by the file extension, and its summary as JSON beside it.
+
+    Returns the summary.
+    """
+    if filepath.lower().endswith('.npy'):
+        np.save(filepath, table)
+    else:
+        write_stats_csv(filepath, table, (table['frame'],), ('frame',))
+
+    summary = summarize(table)
+    with open(os.path.splitext(filepath)[0] + '_summary.json', 'w') as f:
+        json.dump(summary, f, indent=2)
+    return summary
@@ -0,0 +1,132 @@
+import logging
+
+import bpy
+
+from .worker import get_executor
+
+log = logging.getLogger(__name__)
+
+
+def sequence_files(source):
+    """File of every frame of an image sequence MovieClip or Image"""
+    from .sequence import frame_number, frame_path
+
+    if source.source != 'SEQUENCE':
+        raise ValueError('Only image sequences can be read frame by frame, not {} sources'.format(source.source))
+
+    filepath = bpy.path.abspath(source.filepath)
+    first = frame_number(filepath)
+    return [frame_path(filepath, first + offset) for offset in range(source.frame_duration)]
+
+
+def load_frame_pixels(filepath):
+    """Pixels of one image file as a (height, width, channels) float32 array, or None if it fails to load.
+
+    The image is removed again right away, so only one frame is held in Blender at a time.
+    """
+    import numpy as np
+
+    try:
+        image = bpy.data.images.load(filepath, check_existing=False)
+    except RuntimeError as e:
+        log.warning('Color Picker Pro skipped frame {}: {}'.format(filepath, e))
+        return None
+
+    try:
+        width, height = image.size
+        channels = image.channels
+        pixels = np.empty(width * height * channels, dtype=np.float32)
+        image.pixels.foreach_get(pixels)
+        return pixels.reshape((height, width, channels))
+    finally:
+        bpy.data.images.remove(image)
+
+
+class SequenceStatsOperator(bpy.types.Operator):
+    bl_idname = 'wm.color_picker_pro_sequence_stats'
+    bl_label = 'Sequence Statistics'
+    bl_description = ('Compute the statistics of a region in every frame of an image sequence '
+                      'and save them as a per-frame table with a summary')
+
+    clip: bpy.props.StringProperty(name='Movie Clip', description='Name of the movie clip to read')
+
+    image: bpy.props.StringProperty(name='Image', description='Name of the image to read, if no movie clip is set')
+
+    region_min: bpy.props.IntVectorProperty(
+        name='Region Corner',
+        description='Bottom left pixel of the region',
+        size=2, min=0)
+
+    region_size: bpy.props.IntVectorProperty(
+        name='Region Size',
+        description='Width and height of the region in pixels, zero extends it to the edge of the frame',
+        size=2, min=0)
+
+    filepath: bpy.props.StringProperty(subtype='FILE_PATH', options={'SKIP_SAVE'})
+    filter_glob: bpy.props.StringProperty(default='*.csv;*.npy', options={'HIDDEN'})
+
+    def source(self):
+        if self.clip:
+            return bpy.data.movieclips.get(self.clip)
+        return bpy.data.images.get(self.image)
+
+    def invoke(self, context, event):
+        space = context.space_data
+        if space is not None and space.type == 'CLIP_EDITOR' and space.clip is not None:
+            self.clip = space.clip.name
+        elif space is not None and space.type == 'IMAGE_EDITOR' and space.image is not None:
+            self.image = space.image.name
+
+        if not self.filepath:
+            self.filepath = 'color_picker_pro_frames.csv'
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        from .sequence import crop_region, frame_number, frame_table, prefetched, region_stats, write_table
+
+        source = self.source()
+        if source is None:
+            self.report({'ERROR'}, 'No movie clip or image to read')
+            return {'CANCELLED'}
+
+        try:
+            paths = sequence_files(source)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+
+        x, y = self.region_min
+        width, height = self.region_size
+
+        def frames():
+            # Blender data can only be read on the main thread, the statistics run on the worker pool
+            for path in paths:
+                pixels = load_frame_pixels(path)
+                region = None if pixels is None else crop_region(pixels, x, y, width, height)
+                yield frame_number(path), region
+
+        wm = context.window_manager
+        wm.progress_begin(0, len(paths))
+        records = []
+        try:
+            for record in prefetched(frames(), region_stats, get_executor()):
+                records.append(record)
+                wm.progress_update(len(records))
+        finally:
+            wm.progress_end()
+
+        try:
+            summary = write_table(frame_table(records), bpy.path.abspath(self.filepath))
+        except OSError as e:
+            self.report({'ERROR'}, 'Failed to save frame statistics: {}'.format(e))
+            return {'CANCELLED'}
+
+        message = 'Saved statistics of {} frames to {}'.format(summary['frames'], self.filepath)
+        if summary['missing_frames']:
+            message += ', {} frames failed to load'.format(summary['missing_frames'])
+        if 'largest_luma_jump' in summary:
+            message += ', largest brightness jump {:.4f} at frame {}'.format(
+                summary['largest_luma_jump'], summary['largest_luma_jump_frame'])
+        self.report({'INFO'}, message)
+        return {'FINISHED'}
@@ -0,0 +1,95 @@
+import numpy as np
+
+# pixel indices share an int64 with the 31 bits of a non-negative float32 brightness
+INDEX_BITS = 26
+
+
+def sliding_max(values, size, axis):
+    """Max of every run of `size` values along an axis in linear time (van Herk/Gil-Werman)"""
+    values = np.moveaxis(values, axis, 0)
+    length = values.shape[0]
+    block_count = -(-length // size)
+
+    padded = np.full((block_count * size,) + values.shape[1:], np.iinfo(values.dtype).min, dtype=values.dtype)
+    padded[:length] = values
+    blocks = padded.reshape((block_count, size) + values.shape[1:])
+
+    prefix = np.maximum.accumulate(blocks, axis=1).reshape(padded.shape)
+    suffix = np.maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape(padded.shape)
+
+    result = np.maximum(suffix[:length - size + 1], prefix[size - 1:length])
+    return np.moveaxis(result, 0, axis)
+
+
+class SnapshotIndex:
+    """Window queries over a (height, width, 3) screen snapshot of uint8 or float32 pixels.
+
+    For 8-bit snapshots, a per-channel summed-area table gives the mean of any rectangle in
+    constant time. The table is uint32 and wraps around on large screens, but the sum of a window
+    under 2**32 / 255 pixels still comes out exact. Float snapshots sum the window itself, since a
+    float32 table of a large screen is too coarse for small windows. For square windows, the
+    brightest and darkest pixels by channel sum come from sliding max maps of packed
+    (brightness, pixel index) keys, built on the first query of each window size.
+    """
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        height, width = snapshot.shape[:2]
+
+        self.table = None
+        if snapshot.dtype == np.uint8:
+            self.table = np.zeros((height + 1, width + 1, 3), dtype=np.uint32)
+            np.cumsum(np.cumsum(snapshot, axis=0, dtype=np.uint32), axis=1, out=self.table[1:, 1:])
+
+        self.packable = height * width < (1 << INDEX_BITS)
+        self._window_size = None
+        self._brightest = None
+        self._darkest = None
+
+    def mean(self, x, y, width, height):
+        """Mean of a rectangle, scaled to [0, 1] for 8-bit snapshots"""
+        if self.table is None:
+            return np.mean(self.snapshot[y:y + height, x:x + width], axis=(0, 1), dtype=np.float64)
+
+        table = self.table
+        total = table[y + height, x + width] - table[y, x + width] - table[y + height, x] + table[y, x]
+        return total / (width * height * 255.0)
+
+    def _keys(self):
+        """Packed keys of every pixel, whose max is the brightest and the darkest pixel respectively"""
+        height, width = self.snapshot.shape[:2]
+        if self.snapshot.dtype == np.uint8:
+            brightness = np.sum(self.snapshot, axis=2, dtype=np.int64)
+        else:
+            brightness = np.maximum(np.sum(self.snapshot, axis=2), 0.0).astype(np.float32)
+            brightness = brightness.view(np.int32).astype(np.int64)
+        bits = brightness << INDEX_BITS
+        indices = np.arange(height * width, dtype=np.int64).reshape((height, width))
+
+        # on ties, both keep the first pixel in row order like np.argmax and np.argmin
+        return bits | ((1 << INDEX_BITS) - 1 - indices), -(bits | indices)
+
+    def _build_windows(self, size):
+        # the keys are only needed to build the maps, so they are not kept
+        brightest_keys, darkest_keys = self._keys()
+        self._brightest = sliding_max(sliding_max(brightest_keys, size, 1), size, 0)
+        del brightest_keys
+        self._darkest = sliding_max(sliding_max(darkest_keys, size, 1), size, 0)
+        self._window_size = size
+
+    def extremes(self, x, y, size):
+        """Brightest and darkest pixels of the size x size window at (x, y), as stored in the snapshot"""
+        if not self.packable:
+            window = self.snapshot[y:y + size, x:x + size].reshape((-1, 3))
+            dot = np.sum(window, axis=1, dtype=np.float64)
+            return window[np.argmax(dot)], window[np.argmin(dot)]
+
+        if self._window_size != size:
+            self._build_windows(size)
+
+        mask = (1 << INDEX_BITS) - 1
+        brightest = (1 << INDEX_BITS) - 1 - (int(self._brightest[y, x]) & mask)
+        darkest = int(-self._darkest[y, x]) & mask
+
+        flat = self.snapshot.reshape((-1, 3))
+        return flat[brightest], flat[darkest]
@@ -0,0 +1,3 @@
+# picker statistics in publishing order, the median is last since writing it updates the bound targets
+STAT_NAMES = ('picker_mean', 'picker_max', 'picker_min', 'picker_std',
+              'picker_p05', 'picker_p95', 'picker_trimmed', 'picker_median')
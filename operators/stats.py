@@ -0,0 +1,392 @@
+import math
+
+import numpy as np
+
+from .stat_names import STAT_NAMES
+
+
+def percentiles(channels, qs):
+    """Per-channel percentiles of (n, 3) pixels in linear time, interpolated like np.percentile"""
+    channels = np.asarray(channels, dtype=np.float32)
+    last = channels.shape[0] - 1
+
+    positions = [q / 100.0 * last for q in qs]
+    lows = [int(np.floor(pos)) for pos in positions]
+    highs = [min(low + 1, last) for low in lows]
+
+    # one partition places every requested rank at once
+    part = np.partition(channels, sorted(set(lows + highs)), axis=0)
+
+    results = []
+    for pos, low, high in zip(positions, lows, highs):
+        frac = pos - low
+        results.append(part[low] + (part[high] - part[low]) * frac)
+
+    return results
+
+
+def median(channels):
+    """Per-channel median of (n, 3) pixels"""
+    return percentiles(channels, (50,))[0]
+
+
+# share of the darkest and of the brightest values left out of the trimmed mean
+TRIM_PERCENT = 5.0
+
+STAT_STAGES = 2
+
+# from this many 8-bit pixels, counting them is faster than converting them and selecting ranks
+BYTE_HISTOGRAM_PIXELS = 1024
+
+
+def _ranks(count):
+    """Every rank the selection has to place, with the percentile positions and trim bounds"""
+    last = count - 1
+    positions = [q / 100.0 * last for q in (5, 50, 95)]
+    lows = [int(np.floor(pos)) for pos in positions]
+    highs = [min(low + 1, last) for low in lows]
+
+    trim = int(count * TRIM_PERCENT / 100.0)
+    kth = sorted({0, last, trim, last - trim} | set(lows) | set(highs))
+    return kth, positions, lows, highs, trim
+
+
+def iter_stats(channels, extremes='CHANNEL'):
+    """Computes the statistics of compute_stats in two stages, one pass for the moments and one selection,
+    yielding the partial results after each so long computations can report progress or stop.
+    Enough 8-bit pixels take the exact histogram path of byte_stats instead, in one stage.
+    """
+    if getattr(channels, 'dtype', None) == np.uint8:
+        if channels.shape[0] >= BYTE_HISTOGRAM_PIXELS:
+            yield byte_stats(channels, extremes)
+            return
+        channels = to_float(channels)
+
+    channels = np.asarray(channels, dtype=np.float32)
+    count = channels.shape[0]
+    results = {}
+
+    total = np.sum(channels, axis=0, dtype=np.float64)
+    squares = np.einsum('ij,ij->j', channels, channels, dtype=np.float64)
+    mean = total / count
+    results['picker_mean'] = mean
+    results['picker_std'] = np.sqrt(np.maximum(squares / count - mean * mean, 0.0))
+
+    if extremes == 'BRIGHTNESS':
+        dot = np.sum(channels, axis=1)
+        results['picker_max'] = channels[np.argmax(dot, axis=0)]
+        results['picker_min'] = channels[np.argmin(dot, axis=0)]
+    yield results
+
+    # one partition places min, max, every percentile and the trim bounds at once
+    kth, positions, lows, highs, trim = _ranks(count)
+    part = np.partition(channels, kth, axis=0)
+
+    if extremes != 'BRIGHTNESS':
+        results['picker_max'] = part[count - 1]
+        results['picker_min'] = part[0]
+
+    p05, p50, p95 = (part[low] + (part[high] - part[low]) * (pos - low)
+                     for pos, low, high in zip(positions, lows, highs))
+    results['picker_p05'] = p05
+    results['picker_p95'] = p95
+    results['picker_trimmed'] = np.mean(part[trim:count - trim], axis=0, dtype=np.float64)
+    results['picker_median'] = p50
+    yield results
+
+
+def compute_stats(channels, extremes='CHANNEL'):
+    """Computes the picker statistics of (n, 3) pixels, keyed by window manager property in STAT_NAMES order.
+
+    With CHANNEL extremes, max and min are taken per channel.
+    With BRIGHTNESS extremes, they are the brightest and darkest pixels by channel sum.
+    """
+    results = None
+    for results in iter_stats(channels, extremes):
+        pass
+    return {name: results[name] for name in STAT_NAMES}
+
+
+def histogram_stats(histogram, values):
+    """Moments and order statistics of per-channel histograms, where values holds each bin's value.
+
+    Ranks are resolved to bin values the same way iter_stats resolves them to pixel values.
+    """
+    count = int(histogram[0].sum())
+    cumulative = np.cumsum(histogram, axis=1)
+
+    def rank_value(rank):
+        return values[[np.searchsorted(c, rank, side='right') for c in cumulative]]
+
+    _kth, positions, lows, highs, trim = _ranks(count)
+    p05, p50, p95 = (rank_value(low) + (rank_value(high) - rank_value(low)) * (pos - low)
+                     for pos, low, high in zip(positions, lows, highs))
+
+    # how many values of each bin have a rank inside the trimmed range
+    kept = np.clip(np.minimum(cumulative, count - trim) - np.maximum(cumulative - histogram, trim), 0, None)
+
+    mean = histogram @ values / count
+    squares = histogram @ (values * values) / count
+    return {
+        'picker_mean': mean,
+        'picker_std': np.sqrt(np.maximum(squares - mean * mean, 0.0)),
+        'picker_p05': p05,
+        'picker_p95': p95,
+        'picker_trimmed': kept @ values / (count - 2 * trim),
+        'picker_median': p50,
+    }
+
+
+# 8-bit values as floats, the same values a FLOAT readback of an 8-bit framebuffer returns
+BYTE_VALUES = np.arange(256) / 255.0
+
+
+def to_float(pixels):
+    """uint8 pixels scaled to [0, 1] float32, any other pixels as they are"""
+    pixels = np.asarray(pixels)
+    if pixels.dtype == np.uint8:
+        return pixels.astype(np.float32) / np.float32(255.0)
+    return pixels
+
+
+def byte_histogram_stats(histogram):
+    """Statistics of per-column 256-bin histograms of 8-bit values, with CHANNEL extremes, scaled to [0, 1]"""
+    results = histogram_stats(histogram, BYTE_VALUES)
+    present = histogram > 0
+    results['picker_max'] = BYTE_VALUES[255 - np.argmax(present[:, ::-1], axis=1)]
+    results['picker_min'] = BYTE_VALUES[np.argmax(present, axis=1)]
+    return results
+
+
+def byte_histogram(channels):
+    """Exact 256-bin histogram of every column of (n, columns) uint8 pixels"""
+    return np.stack([np.bincount(channels[:, column], minlength=256) for column in range(channels.shape[1])])
+
+
+def byte_stats(channels, extremes='CHANNEL'):
+    """Statistics of (n, columns) uint8 pixels from exact 256-bin histograms, scaled to [0, 1].
+
+    Counting replaces the float conversion and the selection of iter_stats,
+    and every order statistic is exact. BRIGHTNESS extremes need the columns to be RGB.
+    """
+    results = byte_histogram_stats(byte_histogram(channels))
+
+    if extremes == 'BRIGHTNESS':
+        dot = np.sum(channels, axis=1, dtype=np.int32)
+        results['picker_max'] = BYTE_VALUES[channels[np.argmax(dot)]]
+        results['picker_min'] = BYTE_VALUES[channels[np.argmin(dot)]]
+    return {name: results[name] for name in STAT_NAMES}
+
+
+HISTOGRAM_BINS = 4096
+
+
+class StatsAccumulator:
+    """Mergeable running statistics for pixels fed in tiles.
+
+    Mean, standard deviation, max and min are exact. The median, percentiles and trimmed mean
+    are read from a per-channel histogram, within half a bin of compute_stats. The histogram
+    starts over [0, 1], where half a bin is 1 / 8192, and doubles its range whenever a tile
+    falls outside it, merging pairs of bins, so HDR values keep the same relative precision.
+    uint8 tiles are counted in exact 256-bin histograms instead, so every statistic of 8-bit reads is exact.
+    """
+
+    def __init__(self, bins=HISTOGRAM_BINS):
+        self.bins = bins
+        self.count = 0
+        self.total = np.zeros(3, dtype=np.float64)
+        self.squares = np.zeros(3, dtype=np.float64)
+        self.max = np.full(3, -np.inf, dtype=np.float32)
+        self.min = np.full(3, np.inf, dtype=np.float32)
+        self.histogram = np.zeros((3, bins), dtype=np.int64)
+        # range of the histogram, always a power of two wide
+        self.bottom, self.top = 0.0, 1.0
+        self.byte_histogram = np.zeros((3, 256), dtype=np.int64)
+
+    def update(self, channels):
+        if getattr(channels, 'dtype', None) == np.uint8:
+            self.byte_histogram += byte_histogram(channels)
+            return
+
+        channels = np.asarray(channels, dtype=np.float32)
+        if channels.shape[0] == 0:
+            return
+
+        self.count += channels.shape[0]
+        self.total += np.sum(channels, axis=0, dtype=np.float64)
+        self.squares += np.einsum('ij,ij->j', channels, channels, dtype=np.float64)
+        tile_max, tile_min = np.max(channels, axis=0), np.min(channels, axis=0)
+        np.maximum(self.max, tile_max, out=self.max)
+        np.minimum(self.min, tile_min, out=self.min)
+        self._cover(float(np.min(tile_min)), float(np.max(tile_max)))
+
+        for channel in range(3):
+            self.histogram[channel] += np.bincount(self._bin_indices(channels[:, channel]), minlength=self.bins)
+
+    def _bin_indices(self, values):
+        scale = self.bins / (self.top - self.bottom)
+        return np.clip(((values - self.bottom) * scale).astype(np.int64), 0, self.bins - 1)
+
+    def _cover(self, low, high):
+        """Doubles the histogram range until it holds [low, high], merging every pair of bins each time"""
+        # infinite values are left in the edge bins
+        low = low if math.isfinite(low) else self.bottom
+        high = high if math.isfinite(high) else self.top
+        while low < self.bottom or high > self.top:
+            width = self.top - self.bottom
+            merged = self.histogram.reshape((3, self.bins // 2, 2)).sum(axis=2)
+            self.histogram[:] = 0
+            if high > self.top:
+                self.histogram[:, :self.bins // 2] = merged
+                self.top += width
+            else:
+                self.histogram[:, self.bins // 2:] = merged
+                self.bottom -= width
+
+    def _bin_values(self):
+        """Value at the center of every histogram bin"""
+        return self.bottom + (np.arange(self.bins) + 0.5) * ((self.top - self.bottom) / self.bins)
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.squares += other.squares
+        np.maximum(self.max, other.max, out=self.max)
+        np.minimum(self.min, other.min, out=self.min)
+        self._cover(other.bottom, other.top)
+        # the other range lies inside this one, so each of its bins falls in one of these
+        bin_indices = self._bin_indices(other._bin_values())
+        for channel in range(3):
+            np.add.at(self.histogram[channel], bin_indices, other.histogram[channel])
+        self.byte_histogram += other.byte_histogram
+
+    def _fold_bytes(self):
+        """Moves the 8-bit counts into the float statistics, for tiles of both kinds"""
+        byte_histogram = self.byte_histogram
+        present = byte_histogram > 0
+        self.count += int(byte_histogram[0].sum())
+        self.total += byte_histogram @ BYTE_VALUES
+        self.squares += byte_histogram @ (BYTE_VALUES * BYTE_VALUES)
+        np.maximum(self.max, BYTE_VALUES[255 - np.argmax(present[:, ::-1], axis=1)], out=self.max)
+        np.minimum(self.min, BYTE_VALUES[np.argmax(present, axis=1)], out=self.min)
+
+        bin_indices = self._bin_indices(BYTE_VALUES)
+        for channel in range(3):
+            np.add.at(self.histogram[channel], bin_indices, byte_histogram[channel])
+        byte_histogram[:] = 0
+
+    def results(self):
+        """Statistics in the same form as compute_stats"""
+        if self.byte_histogram.any():
+            if self.count == 0:
+                results = byte_histogram_stats(self.byte_histogram)
+                return {name: results[name] for name in STAT_NAMES}
+            self._fold_bytes()
+
+        results = histogram_stats(self.histogram, self._bin_values())
+
+        mean = self.total / self.count
+        results['picker_mean'] = mean
+        results['picker_std'] = np.sqrt(np.maximum(self.squares / self.count - mean * mean, 0.0))
+        results['picker_max'] = self.max
+        results['picker_min'] = self.min
+        return {name: results[name] for name in STAT_NAMES}
+
+
+class SlidingWindowStats:
+    """Picker statistics of a square window moving over a snapshot index.
+
+    Per-channel 256-level histograms are updated with only the rows and columns that enter
+    and leave the window, falling back to a full recompute on large jumps, while the mean
+    and extremes come from the index.
+    Statistics read from the histograms are exact for 8-bit snapshots and within 1 / 510 for float
+    values in [0, 1]. Snapshots with values outside it, like HDR float reads, are not quantized,
+    and every window is computed from its pixels instead.
+    """
+
+    levels = 256
+
+    def __init__(self, index, size):
+        self.index = index
+        self.size = size
+        snapshot = index.snapshot
+        self.origin = None
+        self.histogram = np.zeros(3 * self.levels, dtype=np.int64)
+
+        # NaN fails both comparisons, so it is not quantized either
+        self.incremental = snapshot.dtype == np.uint8 or bool(np.min(snapshot) >= 0.0 and np.max(snapshot) <= 1.0)
+        self.quantized = None
+        if snapshot.dtype == np.uint8:
+            self.quantized = snapshot.astype(np.uint16)
+        elif self.incremental:
+            self.quantized = np.rint(snapshot * np.float32(self.levels - 1)).astype(np.uint16)
+        if self.quantized is not None:
+            # each channel's levels are offset into its own part of the histogram
+            self.quantized += np.arange(3, dtype=np.uint16) * self.levels
+
+    def _apply(self, x0, x1, y0, y1, sign):
+        if x0 >= x1 or y0 >= y1:
+            return
+        self.histogram += sign * np.bincount(self.quantized[y0:y1, x0:x1].reshape(-1),
+                                             minlength=3 * self.levels)
+
+    def move_to(self, x, y):
+        """Moves the window's lower-left corner to snapshot pixel (x, y)"""
+        size = self.size
+        if not self.incremental:
+            self.origin = (x, y)
+            return
+
+        if self.origin is not None:
+            old_x, old_y = self.origin
+            dx, dy = x - old_x, y - old_y
+            if 2 * (abs(dx) + abs(dy)) < size:
+                # slide horizontally over the old rows, then vertically over the new columns
+                if dx > 0:
+                    self._apply(old_x, old_x + dx, old_y, old_y + size, -1)
+                    self._apply(old_x + size, x + size, old_y, old_y + size, 1)
+                elif dx < 0:
+                    self._apply(x + size, old_x + size, old_y, old_y + size, -1)
+                    self._apply(x, old_x, old_y, old_y + size, 1)
+                if dy > 0:
+                    self._apply(x, x + size, old_y, y, -1)
+                    self._apply(x, x + size, old_y + size, y + size, 1)
+                elif dy < 0:
+                    self._apply(x, x + size, y + size, old_y + size, -1)
+                    self._apply(x, x + size, y, old_y, 1)
+                self.origin = (x, y)
+                return
+
+        self.histogram[:] = 0
+        self._apply(x, x + size, y, y + size, 1)
+        self.origin = (x, y)
+
+    def window(self):
+        x, y = self.origin
+        return self.index.snapshot[y:y + self.size, x:x + self.size]
+
+    def results(self):
+        """Statistics in the same form as compute_stats with BRIGHTNESS extremes"""
+        if not self.incremental:
+            return compute_stats(self.window().reshape((-1, 3)), extremes='BRIGHTNESS')
+
+        x, y = self.origin
+        results = histogram_stats(self.histogram.reshape((3, self.levels)),
+                                  np.arange(self.levels) / (self.levels - 1))
+
+        results['picker_mean'] = self.index.mean(x, y, self.size, self.size)
+        results['picker_max'], results['picker_min'] = (to_float(pixel) for pixel in self.index.extremes(x, y, self.size))
+        return {name: results[name] for name in STAT_NAMES}
+
+
+def write_stats_csv(filepath, records, index_columns, index_names, index_formats=None):
+    """Writes one line per record of picker statistics, after columns identifying each record, integers by default"""
+    columns = list(index_columns)
+    columns.extend(records[name][:, channel] for name in STAT_NAMES for channel in range(3))
+
+    header = list(index_names) + ['{}_{}'.format(name[len('picker_'):], channel)
+                                  for name in STAT_NAMES for channel in 'rgb']
+    formats = list(index_formats or ['%d'] * len(index_columns))
+    formats += ['%.6f'] * (len(columns) - len(index_columns))
+    np.savetxt(filepath, np.column_stack(columns), fmt=formats, delimiter=',',
+               header=','.join(header), comments='')
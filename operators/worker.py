@@ -0,0 +1,161 @@
+import concurrent.futures
+import logging
+import queue
+import threading
+
+log = logging.getLogger(__name__)
+
+# tiles read ahead of the one the worker accumulates, bounding the memory of tiled jobs
+TILES_IN_FLIGHT = 1
+
+# seconds a worker waits for the next tile before checking whether its job was cancelled
+QUEUE_POLL_SECONDS = 0.05
+
+_executor = None
+_current_job = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix='color_picker_pro')
+    return _executor
+
+
+def shutdown():
+    global _executor
+    cancel_current()
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+
+def cancel_current():
+    if _current_job is not None:
+        _current_job.cancel()
+
+
+class StatsJob:
+    """Computes picker statistics of copied pixels on a worker thread.
+
+    Progress is the fraction of reductions done, and a cancelled job stops at the next one.
+    """
+
+    def __init__(self, channels, extremes='CHANNEL'):
+        self.channels = channels
+        self.extremes = extremes
+        self.progress = 0.0
+        self._cancelled = threading.Event()
+        self._future = None
+
+    def _stages(self):
+        """Yields the progress and the partial results after each reduction"""
+        from .stats import STAT_STAGES, iter_stats
+
+        for stage, results in enumerate(iter_stats(self.channels, self.extremes), start=1):
+            yield stage / STAT_STAGES, results
+
+    def feed(self):
+        """Called from the main thread while the job runs, returns whether it still needs feeding"""
+        return False
+
+    def _run(self):
+        results = None
+        for progress, results in self._stages():
+            if self._cancelled.is_set():
+                return None
+            self.progress = progress
+        return results
+
+    def submit(self):
+        self._future = get_executor().submit(self._run)
+        return self
+
+    def cancel(self):
+        self._cancelled.set()
+        if self._future is not None:
+            self._future.cancel()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def done(self):
+        return self._future is not None and self._future.done()
+
+    def results(self):
+        """Finished statistics, or None if the job was cancelled or failed"""
+        if self.cancelled or self._future.cancelled():
+            return None
+        try:
+            return self._future.result()
+        except Exception as e:
+            log.error('Color statistics failed: {}'.format(e))
+            return None
+
+
+class TiledStatsJob(StatsJob):
+    """Accumulates the statistics of tiles read on the main thread, for rectangles too large for one array.
+
+    The main thread reads tiles with feed() only as the worker takes them, through a queue of
+    TILES_IN_FLIGHT tiles, so memory stays bounded by the tile size whatever the rectangle's.
+    Progress is the fraction of the count tiles accumulated.
+    """
+
+    def __init__(self, tiles, count):
+        super().__init__(None)
+        self.tiles = tiles
+        self.count = count
+        self._queue = queue.Queue(maxsize=TILES_IN_FLIGHT)
+
+    def feed(self):
+        """Reads tiles into the queue until it is full, returning whether any are left to read"""
+        while self.tiles is not None and not self._queue.full() and not self.cancelled:
+            tile = next(self.tiles, None)
+            if tile is None:
+                self.tiles = None
+            # None also tells the worker the tiles ran out
+            self._queue.put(tile)
+        return self.tiles is not None and not self.cancelled
+
+    def _next_tile(self):
+        while not self._cancelled.is_set():
+            try:
+                return self._queue.get(timeout=QUEUE_POLL_SECONDS)
+            except queue.Empty:
+                pass
+        return None
+
+    def _stages(self):
+        from .stats import StatsAccumulator
+
+        accumulator = StatsAccumulator()
+        for index in range(self.count):
+            tile = self._next_tile()
+            if tile is None:
+                break
+            accumulator.update(tile.reshape((-1, 3)))
+            yield (index + 1) / self.count, None
+        yield 1.0, accumulator.results()
+
+
+def _start(job):
+    global _current_job
+    cancel_current()
+    _current_job = job.submit()
+    return _current_job
+
+
+def start_job(channels, extremes='CHANNEL'):
+    """Starts a statistics job, cancelling the one still in flight"""
+    return _start(StatsJob(channels, extremes))
+
+
+def start_tiled_job(tiles, count):
+    """Starts a statistics job over an iterator of count (height, width, 3) tiles, cancelling the one still in flight.
+
+    The first tiles are read at once, the rest by calling feed() on the job from the main thread.
+    """
+    job = _start(TiledStatsJob(tiles, count))
+    job.feed()
+    return job
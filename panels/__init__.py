@@ -18,6 +18,13 @@ Created by Spencer Magnusson
 import bpy
 
 from ..operators import ScreenPickerOperator, ScreenRectOperator, CopyColorOperator, ClearUpdateOperator
+from ..operators import DumpTraceOperator, ClearTimingsOperator, CopyPatchOperator, ExportPatchesOperator
+from ..operators import SequenceStatsOperator, RecallPickOperator, ExportHistoryOperator, ClearHistoryOperator
+from ..operators import RegionMonitorOperator, UnpinRegionOperator
+from ..operators.checker import sampled_patches
+from ..operators.profiling import profiler
+from ..operators.recall import recorded_picks
+from ..operators.region_monitor import monitor_session
 
 panel_title = 'Color Picker Pro'
 
@@ -31,11 +38,8 @@ def draw_panel(layout, context):
     def draw_picker(layout, attr, **kwargs):
         row = layout.row()
         row.prop(wm, attr, **kwargs)
-        if wm.update_source == attr:
-            row.operator(ClearUpdateOperator.bl_idname, text='', icon='X')
-        else:
-            op = row.operator(CopyColorOperator.bl_idname, text='', icon='COPYDOWN')
-            op.picker_type = attr
+        op = row.operator(CopyColorOperator.bl_idname, text='', icon='COPYDOWN')
+        op.picker_type = attr
 
     col = layout.column()
     draw_picker(col, 'picker_max', text='Picked Max')
@@ -43,6 +47,36 @@ def draw_panel(layout, context):
     draw_picker(col, 'picker_median', text='Median')
     draw_picker(col, 'picker_min', text='Min')
 
+    col = layout.column()
+    draw_picker(col, 'picker_p95', text='95th Percentile')
+    draw_picker(col, 'picker_trimmed', text='Trimmed Mean')
+    draw_picker(col, 'picker_p05', text='5th Percentile')
+    draw_picker(col, 'picker_std', text='Std Dev')
+
+    col = layout.column()
+    col.prop(wm, 'picker_readout')
+    if wm.picker_readout != 'NONE':
+        from ..operators.colorspace import linear_to_lab, rgb_to_hsv, srgb_to_linear
+
+        median = tuple(wm.picker_median)
+        if wm.picker_readout == 'HSV':
+            col.label(text='H {:.3f}  S {:.3f}  V {:.3f}'.format(*rgb_to_hsv(median)))
+        else:
+            linear = median if wm.picker_scene_linear else srgb_to_linear(median)
+            col.label(text='L {:.1f}  a {:.1f}  b {:.1f}'.format(*linear_to_lab(linear)))
+
+    if wm.picker_bindings:
+        box = layout.box()
+        row = box.row()
+        row.label(text='Updating', icon='LINKED')
+        row.operator(ClearUpdateOperator.bl_idname, text='', icon='X').index = -1
+
+        for index, binding in enumerate(wm.picker_bindings):
+            row = box.row(align=True)
+            row.label(text=binding.data_path)
+            row.prop(binding, 'source', text='')
+            row.operator(ClearUpdateOperator.bl_idname, text='', icon='REMOVE').index = index
+
     layout.separator()
 
     split = layout.split(factor=0.4)
@@ -59,11 +93,105 @@ def draw_panel(layout, context):
     row.prop(wm, 'custom_size', slider=True, text='Custom')
     row.operator(ScreenPickerOperator.bl_idname, text='', icon='EYEDROPPER').sqrt_length = wm.custom_size
 
+    layout.prop(wm, 'picker_kernel')
+    layout.prop(wm, 'picker_sample_rate')
+    layout.prop(wm, 'picker_use_snapshot')
+    layout.prop(wm, 'picker_readback')
+    layout.prop(wm, 'picker_update_rate')
+    if context.space_data.type == 'IMAGE_EDITOR':
+        layout.prop(wm, 'picker_sample_image')
+
     split = layout.split(factor=0.4)
     split.alignment = 'RIGHT'
     split.label(text='Rectangle')
     split.operator(ScreenRectOperator.bl_idname, text='', icon='SELECT_SET')
 
+    row = layout.row(align=True)
+    row.prop(wm, 'picker_palette_size', text='Palette')
+    op = row.operator(ScreenRectOperator.bl_idname, text='', icon='COLOR')
+    op.extract_palette = True
+    op.palette_size = wm.picker_palette_size
+
+    col = layout.column(align=True)
+    row = col.row(align=True)
+    row.prop(wm, 'picker_grid_rows', text='Chart')
+    row.prop(wm, 'picker_grid_cols', text='')
+    op = row.operator(ScreenRectOperator.bl_idname, text='', icon='MESH_GRID')
+    op.grid_rows = wm.picker_grid_rows
+    op.grid_cols = wm.picker_grid_cols
+    op.grid_inset = wm.picker_grid_inset
+    col.prop(wm, 'picker_grid_inset')
+
+    patch_count = sampled_patches()
+    if patch_count > 0:
+        row = layout.row(align=True)
+        row.prop(wm, 'picker_patch_index', text='Patch of {}'.format(patch_count))
+        row.operator(CopyPatchOperator.bl_idname, text='', icon='PASTEDOWN').index = wm.picker_patch_index
+        row.operator(ExportPatchesOperator.bl_idname, text='', icon='EXPORT')
+
+    box = layout.box()
+    row = box.row(align=True)
+    row.label(text='Monitor', icon='PINNED')
+    row.operator(ScreenRectOperator.bl_idname, text='', icon='ADD').pin_region = True
+    row.operator(RegionMonitorOperator.bl_idname, text='', icon='PAUSE' if monitor_session.running else 'PLAY')
+    row.operator(UnpinRegionOperator.bl_idname, text='', icon='X').index = -1
+
+    for index, region in enumerate(wm.picker_monitor_regions):
+        row = box.row(align=True)
+        row.label(text='{}: {}x{}'.format(index, region.width, region.height),
+                  icon='RADIOBUT_ON' if index == wm.picker_monitor_index else 'RADIOBUT_OFF')
+        row.prop(region, 'mean', text='')
+        row.label(text='Std {:.4f}'.format(max(region.std)))
+        row.operator(UnpinRegionOperator.bl_idname, text='', icon='REMOVE').index = index
+
+    if wm.picker_monitor_regions:
+        col = box.column(align=True)
+        col.prop(wm, 'picker_monitor_index')
+        col.prop(wm, 'picker_monitor_interval')
+        col.prop(wm, 'picker_monitor_budget')
+
+    box = layout.box()
+    row = box.row(align=True)
+    row.prop(wm, 'picker_history_age', text='History of {}'.format(recorded_picks()))
+    row.operator(RecallPickOperator.bl_idname, text='', icon='RECOVER_LAST').age = wm.picker_history_age
+    row.operator(ExportHistoryOperator.bl_idname, text='', icon='EXPORT')
+    row.operator(ClearHistoryOperator.bl_idname, text='', icon='TRASH')
+    box.prop(wm, 'picker_history_file')
+
+    if context.space_data.type in {'CLIP_EDITOR', 'IMAGE_EDITOR'}:
+        layout.operator(SequenceStatsOperator.bl_idname, icon='SEQUENCE')
+
+
+def draw_debug_panel(layout, context):
+    layout.active = context.window_manager.picker_debug
+
+    summary = profiler.summary()
+    if not summary:
+        layout.label(text='No timings recorded')
+
+    col = layout.column(align=True)
+    for phase, (mean_ms, p95_ms, count) in summary.items():
+        row = col.row()
+        row.label(text=phase.capitalize())
+        row.label(text='{:.2f} ms'.format(mean_ms))
+        row.label(text='p95 {:.2f} ms'.format(p95_ms))
+
+    row = layout.row(align=True)
+    row.operator(DumpTraceOperator.bl_idname, icon='EXPORT')
+    row.operator(ClearTimingsOperator.bl_idname, text='', icon='TRASH')
+
+
+class DebugPanel:
+    bl_label = 'Timings'
+    bl_region_type = 'UI'
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw_header(self, context):
+        self.layout.prop(context.window_manager, 'picker_debug', text='')
+
+    def draw(self, context):
+        draw_debug_panel(self.layout, context)
+
 
 class IMAGE_PT_color_picker(bpy.types.Panel):
     bl_label = panel_title
@@ -95,6 +223,25 @@ class CLIP_PT_color_picker(bpy.types.Panel):
         draw_panel(self.layout, context)
 
 
-_classes_to_register = [IMAGE_PT_color_picker, VIEW_PT_color_picker, CLIP_PT_color_picker]
+class IMAGE_PT_color_picker_debug(DebugPanel, bpy.types.Panel):
+    bl_idname = 'IMAGE_PT_color_picker_debug'
+    bl_parent_id = IMAGE_PT_color_picker.bl_idname
+    bl_space_type = 'IMAGE_EDITOR'
+
+
+class VIEW_PT_color_picker_debug(DebugPanel, bpy.types.Panel):
+    bl_idname = 'VIEW_PT_color_picker_debug'
+    bl_parent_id = VIEW_PT_color_picker.bl_idname
+    bl_space_type = 'VIEW_3D'
+
+
+class CLIP_PT_color_picker_debug(DebugPanel, bpy.types.Panel):
+    bl_idname = 'CLIP_PT_color_picker_debug'
+    bl_parent_id = CLIP_PT_color_picker.bl_idname
+    bl_space_type = 'CLIP_EDITOR'
+
+
+_classes_to_register = [IMAGE_PT_color_picker, VIEW_PT_color_picker, CLIP_PT_color_picker,
+                        IMAGE_PT_color_picker_debug, VIEW_PT_color_picker_debug, CLIP_PT_color_picker_debug]
 
 register, unregister = bpy.utils.register_classes_factory(_classes_to_register)